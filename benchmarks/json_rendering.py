@@ -0,0 +1,106 @@
+"""
+Compares JSON rendering and response compression for RecipeSerializer-shaped payloads.
+
+Run from the repository root:
+    python benchmarks/json_rendering.py [--recipes 1000] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import timeit
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pantry.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from pantry_api.middleware import brotli  # noqa: E402
+from pantry_api.renderers import ORJSONRenderer, orjson  # noqa: E402
+
+
+def recipe_payload(count, ingredients_per_recipe=8):
+    """
+    Builds a list shaped like RecipeSerializer output, including the Decimal totals.
+    """
+    recipes = []
+    for i in range(count):
+        ingredients = [
+            {
+                "id": i * ingredients_per_recipe + j,
+                "name": f"Ingredient {j}",
+                "calories": 100 + j,
+                "fats": "1.50",
+                "proteins": "3.25",
+                "carbohydrates": "20.00",
+                "measurement_unit": "Cup",
+            }
+            for j in range(ingredients_per_recipe)
+        ]
+        recipes.append(
+            {
+                "id": i,
+                "name": f"Recipe {i}",
+                "instructions": "Mix everything and bake for 30 minutes.",
+                "servings": 4,
+                "ingredients": ingredients,
+                "calories_per_serving": Decimal("512.25"),
+                "total_fats": Decimal("12.00"),
+                "total_proteins": Decimal("26.00"),
+                "total_carbohydrates": Decimal("160.00"),
+            }
+        )
+    return recipes
+
+
+def bench(label, func, repeat):
+    seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{label:<28} {seconds * 1000:9.2f} ms")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    data = recipe_payload(args.recipes)
+    print(f"{args.recipes} recipes, best of {args.repeat}")
+    print(f"orjson: {'yes' if orjson else 'no'}, brotli: {'yes' if brotli else 'no'}")
+    print()
+
+    print("Rendering")
+    default = bench("JSONRenderer", lambda: JSONRenderer().render(data), args.repeat)
+    fast = bench("ORJSONRenderer", lambda: ORJSONRenderer().render(data), args.repeat)
+    print(f"{'speed-up':<28} {default / fast:9.2f} x")
+    print()
+
+    body = ORJSONRenderer().render(data)
+    print("Compression")
+    print(f"{'uncompressed':<28} {len(body):9d} bytes")
+    codecs = [
+        (f"gzip level {level}", lambda level=level: gzip.compress(body, level))
+        for level in (1, 6, 9)
+    ]
+    if brotli is not None:
+        codecs += [
+            (f"brotli quality {q}", lambda q=q: brotli.compress(body, quality=q))
+            for q in (1, 5, 11)
+        ]
+    for label, compress in codecs:
+        size = len(compress())
+        seconds = min(timeit.repeat(compress, number=1, repeat=args.repeat))
+        print(
+            f"{label:<28} {size:9d} bytes {len(body) / size:6.1f}x {seconds * 1000:9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
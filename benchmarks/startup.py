@@ -0,0 +1,124 @@
+"""
+Measures cold-start cost of the WSGI application for each settings profile: interpreter
+plus import time, the first request, and the mean of the following warm requests.
+
+Run from the repository root:
+    python benchmarks/startup.py [--runs 5] [--path /api/] [--importtime]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROFILES = ["pantry.settings", "pantry.settings_api"]
+
+# Runs in a fresh interpreter for every sample so that nothing is imported yet.
+CHILD = r"""
+import io, json, sys, time
+started = time.perf_counter()
+from pantry.wsgi import application
+from django.conf import settings
+imported = time.perf_counter()
+
+def request(path):
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "",
+        "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+        "HTTP_ACCEPT": "application/json", "wsgi.input": io.BytesIO(),
+        "wsgi.url_scheme": "http", "wsgi.errors": sys.stderr,
+    }
+    statuses = []
+    body = b"".join(application(environ, lambda status, headers: statuses.append(status)))
+    if not statuses[0].startswith("200"):
+        raise SystemExit(f"{path} returned {statuses[0]}")
+    return body
+
+request(sys.argv[1])
+first = time.perf_counter()
+warm = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    request(sys.argv[1])
+    warm.append(time.perf_counter() - start)
+print(json.dumps({
+    "import": imported - started,
+    "first_request": first - imported,
+    "warm_request": sum(warm) / len(warm),
+    "modules": len(sys.modules),
+    "middleware": len(settings.MIDDLEWARE),
+    "apps": len(settings.INSTALLED_APPS),
+}))
+"""
+
+
+def run_child(profile, path, warm_requests, importtime=False):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": profile, "PYTHONPATH": str(ROOT)}
+    command = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    command += ["-c", CHILD, path, str(warm_requests)]
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode:
+        raise SystemExit(result.stderr)
+    return {**json.loads(result.stdout), "process": wall}, result.stderr
+
+
+def slowest_imports(stderr, count=10):
+    """
+    Parses `python -X importtime` output into the modules with the largest cumulative time.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), module.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per profile.")
+    parser.add_argument("--path", default="/api/", help="Path requested after startup.")
+    parser.add_argument("--warm-requests", type=int, default=200)
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="Also list the slowest imports of each profile.",
+    )
+    args = parser.parse_args()
+
+    print(f"{args.runs} cold starts per profile, median, GET {args.path}")
+    header = "profile", "process", "import", "first req", "warm req", "modules", "mw"
+    print("{:<22} {:>10} {:>10} {:>10} {:>10} {:>8} {:>4}".format(*header))
+    for profile in PROFILES:
+        samples = [
+            run_child(profile, args.path, args.warm_requests)[0]
+            for _ in range(args.runs)
+        ]
+
+        def median(key):
+            return statistics.median(sample[key] for sample in samples)
+
+        print(
+            f"{profile:<22} {median('process') * 1000:8.1f}ms {median('import') * 1000:8.1f}ms "
+            f"{median('first_request') * 1000:8.1f}ms {median('warm_request') * 1e6:8.0f}us "
+            f"{samples[0]['modules']:>8} {samples[0]['middleware']:>4}"
+        )
+
+    if args.importtime:
+        for profile in PROFILES:
+            _, stderr = run_child(profile, args.path, 1, importtime=True)
+            print(f"\nSlowest imports for {profile} (cumulative):")
+            for cumulative, module in slowest_imports(stderr):
+                print(f"  {cumulative / 1000:8.1f}ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Lean settings profile for pods that only serve the REST API under /api/.
+
+Select it with DJANGO_SETTINGS_MODULE=pantry.settings_api. It builds on pantry.settings
+and drops the admin, sessions, messages, static files, templates and the middleware that
+only matters to browser sessions. Without sessions, /api/ accepts HTTP Basic authentication
+only; cookie sessions from the admin login do not carry over. Measure the effect with
+benchmarks/startup.py.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+# auth and contenttypes stay installed: DRF builds request.user from django.contrib.auth.
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'pantry_api',
+]
+
+# DRF views are CSRF exempt and authenticate requests themselves, so session, CSRF,
+# auth, messages and clickjacking middleware only add per-request overhead here.
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'pantry_api.middleware.CompressionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'pantry.urls_api'
+
+TEMPLATES = []
+
+# DRF's default SessionAuthentication is dropped on purpose: it reads the user that
+# SessionMiddleware and AuthenticationMiddleware attach to the request, and neither is
+# installed here, so it could never authenticate anyone. Clients of API-only pods
+# authenticate with HTTP Basic, exactly as they already can under pantry.settings.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'pantry_api.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'pantry_api.renderers.ORJSONParser',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
@@ -0,0 +1,9 @@
+"""
+URL configuration for the API-only settings profile (pantry.settings_api).
+Identical to pantry.urls without the admin site.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('pantry_api.urls')),
+]
@@ -0,0 +1,175 @@
+from django.db import transaction
+from django.http import Http404
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+MAX_OPERATIONS = 500
+
+# HTTP method -> (viewset action, whether the operation targets a single object, status).
+METHODS = {
+    "GET": ("retrieve", True, status.HTTP_200_OK),
+    "POST": ("create", False, status.HTTP_201_CREATED),
+    "PUT": ("update", True, status.HTTP_200_OK),
+    "PATCH": ("partial_update", True, status.HTTP_200_OK),
+    "DELETE": ("destroy", True, status.HTTP_204_NO_CONTENT),
+}
+
+
+class BatchAborted(Exception):
+    """
+    Raised inside the batch transaction to roll it back once an operation fails.
+    """
+
+
+def resolve_refs(value, refs):
+    """
+    Replaces {"$ref": name} placeholders with the id created by the operation named `name`.
+    """
+    if isinstance(value, dict):
+        if set(value) == {"$ref"}:
+            try:
+                return refs[value["$ref"]]
+            except (KeyError, TypeError):
+                raise ValidationError(f"Unknown reference {value['$ref']!r}.")
+        return {key: resolve_refs(item, refs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_refs(item, refs) for item in value]
+    return value
+
+
+def references(instance):
+    """
+    Returns the (model, pk) keys of the rows an object points at through foreign keys.
+    """
+    return {
+        (field.related_model, getattr(instance, field.attname))
+        for field in instance._meta.concrete_fields
+        if field.is_relation
+    }
+
+
+class BatchRunner:
+    """
+    Executes batch operations against router viewsets in one transaction, going straight to
+    their querysets, serializers and perform_* hooks instead of dispatching a request per
+    operation. Objects fetched by earlier operations are reused by later ones, except those
+    a create or update in between may have changed (see evict) and anything cached before a
+    delete.
+    """
+
+    def __init__(self, request, resources):
+        self.request = request
+        self.resources = resources
+        self.refs = {}
+        self.instances = {}
+
+    def run(self, operations):
+        """
+        Returns (succeeded, results). Results hold a status and data or errors per operation,
+        up to and including the first failure.
+        """
+        if not isinstance(operations, list) or not operations:
+            raise ValidationError({"operations": "Expected a non-empty list."})
+        if len(operations) > MAX_OPERATIONS:
+            raise ValidationError(
+                {"operations": f"At most {MAX_OPERATIONS} operations per batch."}
+            )
+
+        results = []
+        try:
+            with transaction.atomic():
+                for operation in operations:
+                    result = self.execute(operation)
+                    results.append(result)
+                    if result["status"] >= 400:
+                        raise BatchAborted
+        except BatchAborted:
+            return False, results
+        return True, results
+
+    def execute(self, operation):
+        try:
+            return self.apply(operation)
+        except Http404:
+            return {"status": status.HTTP_404_NOT_FOUND, "errors": "Not found."}
+        except APIException as exc:
+            return {"status": exc.status_code, "errors": exc.detail}
+
+    def apply(self, operation):
+        if not isinstance(operation, dict):
+            raise ValidationError("Each operation must be an object.")
+        method = str(operation.get("method", "")).upper()
+        if method not in METHODS:
+            raise ValidationError({"method": f"Choose from {', '.join(METHODS)}."})
+        viewset_class = self.resources.get(operation.get("resource"))
+        if viewset_class is None:
+            raise ValidationError(
+                {"resource": f"Choose from {', '.join(self.resources)}."}
+            )
+        action, detail, success_status = METHODS[method]
+
+        viewset = viewset_class(
+            request=self.request, format_kwarg=None, action=action, kwargs={}
+        )
+        viewset.check_permissions(self.request)
+        data = resolve_refs(operation.get("data", {}), self.refs)
+
+        instance = None
+        if detail:
+            pk = resolve_refs(operation.get("id"), self.refs)
+            instance = self.get_instance(viewset, pk)
+            viewset.check_object_permissions(self.request, instance)
+
+        if method == "DELETE":
+            # Cascades reach rows the cache cannot trace (a recipe's ingredient rows feed
+            # the usage counters of ingredients it never references), so start afresh.
+            self.instances.clear()
+            viewset.perform_destroy(instance)
+            return {"status": success_status}
+
+        serializer_class = viewset.get_serializer_class()
+        context = viewset.get_serializer_context()
+        if method == "GET":
+            serializer = serializer_class(instance, context=context)
+        else:
+            serializer = serializer_class(
+                instance, data=data, partial=method == "PATCH", context=context
+            )
+            serializer.is_valid(raise_exception=True)
+            previous = references(instance) if instance is not None else set()
+            if method == "POST":
+                viewset.perform_create(serializer)
+            else:
+                viewset.perform_update(serializer)
+            instance = serializer.instance
+            self.evict((type(instance), instance.pk), previous | references(instance))
+            if method == "POST" and "ref" in operation:
+                self.refs[operation["ref"]] = instance.pk
+        return {"status": success_status, "data": serializer.data}
+
+    def get_instance(self, viewset, pk):
+        if pk is None:
+            raise ValidationError({"id": "Required for this method."})
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise ValidationError({"id": "Must be an integer or a reference."})
+        queryset = viewset.get_queryset()
+        key = (queryset.model, pk)
+        if key not in self.instances:
+            try:
+                self.instances[key] = queryset.get(pk=pk)
+            except queryset.model.DoesNotExist:
+                raise Http404
+        return self.instances[key]
+
+    def evict(self, written, referenced):
+        """
+        Drops cached objects a create or update may have changed: the written row, the rows
+        it references now or did before (e.g. an ingredient's usage counters after a
+        RecipeIngredient write) and cached rows referencing it (e.g. ingredients whose unit
+        was renamed, as they carry the unit's name).
+        """
+        for key, cached in list(self.instances.items()):
+            if key == written or key in referenced or written in references(cached):
+                del self.instances[key]
@@ -0,0 +1,190 @@
+import traceback
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import (
+    Recipe,
+    RecipeIngredient,
+    RecipeNutrition,
+    RecomputeJob,
+    SyncClock,
+)
+from .nutrition_index import NUTRIENTS, per_serving_vectors
+from .similarity import update_signatures
+
+# Running jobs untouched for this long belong to a worker that died and are requeued.
+STALE_JOB_TIMEOUT = timedelta(minutes=15)
+
+
+def enqueue(kind, target_ids):
+    """
+    Queues a recompute job per target. Targets that already have a pending job of the same
+    kind are coalesced into it.
+    """
+    RecomputeJob.objects.bulk_create(
+        [RecomputeJob(kind=kind, target_id=target_id) for target_id in target_ids],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_all_recipes():
+    """
+    Queues nutrition and signature jobs for every recipe, e.g. to backfill derived data.
+    """
+    recipe_ids = list(Recipe.objects.values_list("pk", flat=True))
+    enqueue(RecomputeJob.RECIPE_NUTRITION, recipe_ids)
+    enqueue(RecomputeJob.RECIPE_SIGNATURE, recipe_ids)
+    return len(recipe_ids)
+
+
+def recompute_nutrition(recipe_ids):
+    """
+    Stores the per-serving nutrition of the given recipes, stamped with a fresh sync version
+    so nutrition indexes pick the rows up on their next refresh.
+    """
+    vectors = per_serving_vectors(recipe_ids)
+    version = SyncClock.tick()
+    RecipeNutrition.objects.bulk_create(
+        [
+            RecipeNutrition(
+                recipe_id=recipe_id, version=version, **dict(zip(NUTRIENTS, vector))
+            )
+            for recipe_id, vector in vectors.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["recipe"],
+        update_fields=[*NUTRIENTS, "version"],
+    )
+
+
+def expand_ingredients(ingredient_ids):
+    """
+    Fans an ingredient change out to every recipe using the ingredient: queues their
+    nutrition jobs and bumps their sync versions, since synced recipes embed the
+    ingredient and the nutrition totals derived from it. Each recipe gets its own version
+    because the sync cursor assumes no two rows share one.
+    """
+    recipe_ids = list(
+        RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids)
+        .values_list("recipe_id", flat=True)
+        .distinct()
+    )
+    for recipe_id in recipe_ids:
+        Recipe.objects.filter(pk=recipe_id).update(version=SyncClock.tick())
+    enqueue(RecomputeJob.RECIPE_NUTRITION, recipe_ids)
+
+
+HANDLERS = {
+    RecomputeJob.RECIPE_NUTRITION: recompute_nutrition,
+    RecomputeJob.RECIPE_SIGNATURE: update_signatures,
+    RecomputeJob.INGREDIENT: expand_ingredients,
+}
+
+
+def requeue_stale_jobs(stale_after=STALE_JOB_TIMEOUT):
+    """
+    Returns running jobs last updated more than `stale_after` ago to the queue. Stale jobs
+    already covered by a pending job, or by an older stale job, for the same target are
+    deleted instead so the pending uniqueness constraint holds. Returns the number requeued.
+    """
+    stale = RecomputeJob.objects.filter(
+        status=RecomputeJob.RUNNING, updated_at__lt=timezone.now() - stale_after
+    )
+    same_target = RecomputeJob.objects.filter(
+        kind=OuterRef("kind"), target_id=OuterRef("target_id")
+    )
+    stale.filter(
+        Exists(same_target.filter(status=RecomputeJob.PENDING))
+        | Exists(
+            stale.filter(
+                kind=OuterRef("kind"),
+                target_id=OuterRef("target_id"),
+                pk__lt=OuterRef("pk"),
+            )
+        )
+    ).delete()
+    return stale.update(status=RecomputeJob.PENDING, updated_at=timezone.now())
+
+
+def claim_batch(batch_size, stale_after=STALE_JOB_TIMEOUT):
+    """
+    Marks up to batch_size pending jobs as running and returns them, oldest first.
+    Jobs left running by a crashed worker are requeued first.
+    """
+    with transaction.atomic():
+        requeue_stale_jobs(stale_after)
+        pending = RecomputeJob.objects.filter(status=RecomputeJob.PENDING).order_by(
+            "pk"
+        )
+        job_ids = list(
+            pending.select_for_update(skip_locked=True).values_list("pk", flat=True)[
+                :batch_size
+            ]
+        )
+        RecomputeJob.objects.filter(pk__in=job_ids).update(
+            status=RecomputeJob.RUNNING, updated_at=timezone.now()
+        )
+    return list(RecomputeJob.objects.filter(pk__in=job_ids).order_by("pk"))
+
+
+def run_jobs(kind, jobs):
+    """
+    Runs the handler for jobs of one kind in a single transaction and marks them done.
+    If the handler raises, the jobs are run again one at a time so only the targets that
+    fail on their own are marked failed.
+    """
+    try:
+        with transaction.atomic():
+            HANDLERS[kind]({job.target_id for job in jobs})
+    except Exception:
+        if len(jobs) > 1:
+            for job in jobs:
+                run_jobs(kind, [job])
+            return
+        RecomputeJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=RecomputeJob.FAILED,
+            error=traceback.format_exc(),
+            updated_at=timezone.now(),
+        )
+    else:
+        RecomputeJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=RecomputeJob.DONE, updated_at=timezone.now()
+        )
+
+
+def process_batch(batch_size=500):
+    """
+    Claims a batch of jobs and runs them, one handler call per kind. Returns the number of
+    jobs processed.
+    """
+    jobs = claim_batch(batch_size)
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+
+    for kind, kind_jobs in by_kind.items():
+        run_jobs(kind, kind_jobs)
+    return len(jobs)
+
+
+def process_all(batch_size=500):
+    """
+    Runs batches in the current process until the queue is empty.
+    """
+    processed = 0
+    while count := process_batch(batch_size):
+        processed += count
+    return processed
+
+
+def prune_finished_jobs(retention=timedelta(days=7)):
+    """
+    Deletes done and failed jobs last updated more than `retention` ago, keeping the job
+    table, the /api/jobs/ listing and its stats bounded. Returns the number of jobs deleted.
+    """
+    deleted, _ = RecomputeJob.objects.filter(
+        status__in=[RecomputeJob.DONE, RecomputeJob.FAILED],
+        updated_at__lt=timezone.now() - retention,
+    ).delete()
+    return deleted
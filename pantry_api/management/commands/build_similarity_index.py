@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from pantry_api.similarity import rebuild_signatures
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MinHash/LSH index used for similar-recipe recommendations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows read and written per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_signatures(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} recipes."))
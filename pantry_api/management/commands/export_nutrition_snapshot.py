@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from pantry_api.snapshot import write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a memory-mappable columnar snapshot of units, ingredients, recipes and "
+        "recipe ingredients for analytics jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write the snapshot to.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows fetched per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        counts = write_snapshot(options["path"], chunk_size=options["chunk_size"])
+        summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {summary} to {options['path']}."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from pantry_api.usage import rebuild_usage
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes ingredient usage counters from scratch, e.g. after bulk imports "
+        "that bypassed model signals."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_usage()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt usage for {count} ingredients."))
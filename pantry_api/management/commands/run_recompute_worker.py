@@ -0,0 +1,94 @@
+import time
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from pantry_api.jobs import (
+    enqueue_all_recipes,
+    process_all,
+    process_batch,
+    prune_finished_jobs,
+)
+
+
+def _run_batch(batch_size):
+    return process_batch(batch_size)
+
+
+class Command(BaseCommand):
+    help = "Processes queued nutrition and index recompute jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=2,
+            help="Worker processes in the pool. 0 runs jobs in this process.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Jobs claimed and processed together by each worker.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling.",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            default=7,
+            help="Delete done and failed jobs older than this whenever the queue is empty.",
+        )
+        parser.add_argument(
+            "--enqueue-all",
+            action="store_true",
+            help="Queue a recomputation of every recipe before processing.",
+        )
+
+    def handle(self, *args, **options):
+        if options["enqueue_all"]:
+            count = enqueue_all_recipes()
+            self.stdout.write(f"Queued {count} recipes.")
+
+        if options["processes"] < 1:
+            self.loop(partial(process_all, options["batch_size"]), options)
+            return
+
+        processes = options["processes"]
+        if connection.vendor == "sqlite" and processes > 1:
+            # SQLite allows a single writer, so extra workers would only fail with
+            # "database is locked".
+            self.stderr.write("SQLite does not support concurrent workers, using one.")
+            processes = 1
+
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            batches = [options["batch_size"]] * processes
+            self.loop(lambda: sum(pool.map(_run_batch, batches)), options)
+
+    def loop(self, run, options):
+        while True:
+            processed = run()
+            if processed:
+                self.stdout.write(f"Processed {processed} jobs.")
+                continue
+            pruned = prune_finished_jobs(timedelta(days=options["retention_days"]))
+            if pruned:
+                self.stdout.write(f"Pruned {pruned} finished jobs.")
+            # Pool workers forked later must not inherit this process's connection.
+            connections.close_all()
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS("Queue is empty."))
+                return
+            time.sleep(options["poll_interval"])
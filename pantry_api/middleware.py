@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+re_accepts_br = _lazy_re_compile(r"\bbr\b")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses of at least API_COMPRESSION_MIN_SIZE bytes. Brotli is used for JSON
+    responses when the client accepts it and the brotli package is installed, gzip otherwise.
+
+    Brotli gets no BREACH padding, so it is limited to application/json API payloads, which
+    carry no CSRF tokens. HTML such as the admin and browsable API pages goes through Django's
+    gzip path with its random-length padding.
+    """
+
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        min_size = getattr(settings, "API_COMPRESSION_MIN_SIZE", 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith("application/json")
+            or not re_accepts_br.search(accept_encoding)
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = brotli.compress(
+            response.content, quality=self.brotli_quality
+        )
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:39
+
+from django.db import migrations, models
+
+
+def stamp_existing_rows(apps, schema_editor):
+    """
+    Gives rows created before change tracking a version so the first sync picks them up.
+    """
+    version = 0
+    for model_name in ["MeasurementUnit", "Ingredient", "Recipe", "RecipeIngredient"]:
+        model = apps.get_model("pantry_api", model_name)
+        for pk in model.objects.order_by("pk").values_list("pk", flat=True):
+            version += 1
+            model.objects.filter(pk=pk).update(version=version)
+    apps.get_model("pantry_api", "SyncClock").objects.create(pk=1, value=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pantry_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncClock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=50)),
+                ("object_id", models.BigIntegerField()),
+                ("version", models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="version",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="measurementunit",
+            name="version",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="version",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipeingredient",
+            name="version",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(stamp_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pantry_api", "0002_sync_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSignature",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="pantry_api.recipe",
+                    ),
+                ),
+                ("signature", models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SignatureBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.BigIntegerField(db_index=True)),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="pantry_api.recipe",
+                    ),
+                ),
+            ],
+        ),
+    ]
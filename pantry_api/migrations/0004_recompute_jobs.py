@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pantry_api", "0003_recipe_signatures"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeNutrition",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="pantry_api.recipe",
+                    ),
+                ),
+                ("calories", models.FloatField(default=0)),
+                ("proteins", models.FloatField(default=0)),
+                ("fats", models.FloatField(default=0)),
+                ("carbohydrates", models.FloatField(default=0)),
+                ("version", models.BigIntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RecomputeJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("recipe_nutrition", "Recipe nutrition"),
+                            ("recipe_signature", "Recipe signature"),
+                            ("ingredient", "Ingredient dependants"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("target_id", models.BigIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "pending")),
+                        fields=("kind", "target_id"),
+                        name="unique_pending_recompute_job",
+                    )
+                ],
+            },
+        ),
+    ]
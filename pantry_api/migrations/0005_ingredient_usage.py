@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:49
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_usage(apps, schema_editor):
+    """
+    Creates usage counters for ingredients that existed before they were tracked.
+    """
+    Ingredient = apps.get_model("pantry_api", "Ingredient")
+    IngredientUsage = apps.get_model("pantry_api", "IngredientUsage")
+    RecipeIngredient = apps.get_model("pantry_api", "RecipeIngredient")
+    totals = {
+        row["ingredient_id"]: row
+        for row in RecipeIngredient.objects.values("ingredient_id")
+        .annotate(recipe_count=Count("pk"), total_quantity=Sum("quantity"))
+        .order_by()
+    }
+    usages = []
+    for ingredient_id in Ingredient.objects.values_list("pk", flat=True):
+        row = totals.get(ingredient_id)
+        count = row["recipe_count"] if row else 0
+        total = Decimal(row["total_quantity"] or 0) if row else Decimal(0)
+        average = (total / count).quantize(Decimal("0.01")) if count else Decimal(0)
+        usages.append(
+            IngredientUsage(
+                ingredient_id=ingredient_id,
+                recipe_count=count,
+                total_quantity=total,
+                average_quantity=average,
+            )
+        )
+    IngredientUsage.objects.bulk_create(usages)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pantry_api", "0004_recompute_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngredientUsage",
+            fields=[
+                (
+                    "ingredient",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="usage",
+                        serialize=False,
+                        to="pantry_api.ingredient",
+                    ),
+                ),
+                ("recipe_count", models.IntegerField(db_index=True, default=0)),
+                (
+                    "total_quantity",
+                    models.DecimalField(
+                        db_index=True, decimal_places=2, default=0, max_digits=12
+                    ),
+                ),
+                (
+                    "average_quantity",
+                    models.DecimalField(
+                        db_index=True, decimal_places=2, default=0, max_digits=12
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_usage, migrations.RunPython.noop),
+    ]
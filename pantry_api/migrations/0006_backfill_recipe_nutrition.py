@@ -0,0 +1,73 @@
+from django.db import migrations
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+NUTRIENTS = ("calories", "proteins", "fats", "carbohydrates")
+
+
+def backfill_derived_data(apps, schema_editor):
+    """
+    Fills RecipeNutrition for recipes that existed before the recompute worker, so the
+    nearest-recipe search works straight after migrating, and queues signature jobs so the
+    worker rebuilds the similarity index.
+    """
+    Recipe = apps.get_model("pantry_api", "Recipe")
+    RecipeIngredient = apps.get_model("pantry_api", "RecipeIngredient")
+    RecipeNutrition = apps.get_model("pantry_api", "RecipeNutrition")
+    RecomputeJob = apps.get_model("pantry_api", "RecomputeJob")
+    SyncClock = apps.get_model("pantry_api", "SyncClock")
+
+    servings = dict(Recipe.objects.values_list("pk", "servings"))
+    if not servings:
+        return
+    totals = dict.fromkeys(servings, (0.0, 0.0, 0.0, 0.0))
+    aggregates = {
+        nutrient: Sum(
+            ExpressionWrapper(
+                F("quantity") * F(f"ingredient__{nutrient}"),
+                output_field=DecimalField(),
+            )
+        )
+        for nutrient in NUTRIENTS
+    }
+    for row in (
+        RecipeIngredient.objects.values("recipe_id").annotate(**aggregates).order_by()
+    ):
+        totals[row["recipe_id"]] = tuple(float(row[n] or 0) for n in NUTRIENTS)
+
+    clock, _ = SyncClock.objects.get_or_create(pk=1)
+    clock.value += 1
+    clock.save()
+    RecipeNutrition.objects.bulk_create(
+        [
+            RecipeNutrition(
+                recipe_id=recipe_id,
+                version=clock.value,
+                **{
+                    nutrient: (
+                        total / servings[recipe_id] if servings[recipe_id] else 0.0
+                    )
+                    for nutrient, total in zip(NUTRIENTS, totals[recipe_id])
+                },
+            )
+            for recipe_id in servings
+        ],
+        ignore_conflicts=True,
+    )
+    RecomputeJob.objects.bulk_create(
+        [
+            RecomputeJob(kind="recipe_signature", target_id=recipe_id)
+            for recipe_id in servings
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pantry_api", "0005_ingredient_usage"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_derived_data, migrations.RunPython.noop),
+    ]
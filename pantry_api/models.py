@@ -1,7 +1,60 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 
 
-class MeasurementUnit(models.Model):
+class SyncClock(models.Model):
+    """
+    Single-row counter handing out monotonic change versions for the delta sync endpoint.
+    """
+
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def tick(cls):
+        """
+        Advances the clock and returns the new version. The row update holds a lock until the
+        surrounding transaction commits, so versions become visible in commit order.
+        """
+        with transaction.atomic():
+            if not cls.objects.filter(pk=1).update(value=F("value") + 1):
+                cls.objects.create(pk=1, value=1)
+            return cls.objects.values_list("value", flat=True).get(pk=1)
+
+
+class Tombstone(models.Model):
+    """
+    Records the deletion of a synced row so clients can drop it on their next delta sync.
+    """
+
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    version = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.version}"
+
+
+class VersionedModel(models.Model):
+    """
+    Abstract base for models tracked by the delta sync endpoint. Every save stamps the row
+    with the next version from the SyncClock.
+    """
+
+    version = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version"}
+        with transaction.atomic(using=kwargs.get("using")):
+            self.version = SyncClock.tick()
+            super().save(*args, **kwargs)
+
+
+class MeasurementUnit(VersionedModel):
     """
     Represents a unit of measurement for ingredients, such as cup, tablespoon, or piece.
     """
@@ -12,7 +65,7 @@ class MeasurementUnit(models.Model):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(VersionedModel):
     """
     Represents an ingredient used in recipes, including its name, caloric value, and macronutrients.
     Measurement unit for this ingredient is defined to standardize recipes.
@@ -31,7 +84,7 @@ class Ingredient(models.Model):
         return f"{self.name} ({self.calories} calories)"
 
 
-class Recipe(models.Model):
+class Recipe(VersionedModel):
     """
     Represents a cooking recipe, which includes a name, cooking instructions, and the number of servings.
     This model also provides properties to calculate nutritional values per serving.
@@ -94,7 +147,7 @@ class Recipe(models.Model):
         )
 
 
-class RecipeIngredient(models.Model):
+class RecipeIngredient(VersionedModel):
     """
     A bridge model between Recipe and Ingredient to specify the quantity of each ingredient used in a recipe.
     """
@@ -107,3 +160,115 @@ class RecipeIngredient(models.Model):
 
     def __str__(self):
         return f"{self.quantity} of {self.ingredient} for {self.recipe}"
+
+
+class RecipeSignature(models.Model):
+    """
+    MinHash signature of a recipe's ingredient set, used to find recipes with similar ingredients.
+    """
+
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True)
+    signature = models.JSONField()
+
+    def __str__(self):
+        return f"Signature for {self.recipe_id}"
+
+
+class SignatureBucket(models.Model):
+    """
+    LSH bucket membership of a recipe. Recipes sharing a bucket key agree on a whole band
+    of their MinHash signatures and are candidates for being similar.
+    """
+
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    key = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.recipe_id} in bucket {self.key}"
+
+
+class RecipeNutrition(models.Model):
+    """
+    Per-serving nutrition of a recipe, precomputed by the recompute worker so searches do not
+    have to aggregate RecipeIngredient rows on the request path.
+    """
+
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True)
+    calories = models.FloatField(default=0)
+    proteins = models.FloatField(default=0)
+    fats = models.FloatField(default=0)
+    carbohydrates = models.FloatField(default=0)
+    version = models.BigIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"Nutrition for {self.recipe_id}"
+
+
+class RecomputeJob(models.Model):
+    """
+    A queued recomputation of derived data for one target, processed by the recompute worker.
+    Pending jobs are unique per kind and target, so repeated edits coalesce into one job.
+    """
+
+    RECIPE_NUTRITION = "recipe_nutrition"
+    RECIPE_SIGNATURE = "recipe_signature"
+    INGREDIENT = "ingredient"
+    KIND_CHOICES = [
+        (RECIPE_NUTRITION, "Recipe nutrition"),
+        (RECIPE_SIGNATURE, "Recipe signature"),
+        (INGREDIENT, "Ingredient dependants"),
+    ]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    target_id = models.BigIntegerField()
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "target_id"],
+                condition=models.Q(status="pending"),
+                name="unique_pending_recompute_job",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.target_id} ({self.status})"
+
+
+class IngredientUsage(models.Model):
+    """
+    Usage counters for an ingredient, maintained incrementally as RecipeIngredient rows change.
+    recipe_count counts RecipeIngredient rows, so an ingredient listed twice in one recipe
+    counts twice. average_quantity is the mean quantity per use, in the ingredient's unit.
+    """
+
+    ingredient = models.OneToOneField(
+        Ingredient, on_delete=models.CASCADE, primary_key=True, related_name="usage"
+    )
+    recipe_count = models.IntegerField(default=0, db_index=True)
+    total_quantity = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, db_index=True
+    )
+    average_quantity = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, db_index=True
+    )
+
+    def __str__(self):
+        return f"{self.ingredient_id} used in {self.recipe_count} recipes"
@@ -0,0 +1,147 @@
+import threading
+from heapq import nsmallest
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from .models import Recipe, RecipeIngredient, RecipeNutrition, SyncClock, Tombstone
+from .utils import optional_import
+
+# Order of the components in every nutrition vector.
+NUTRIENTS = ("calories", "proteins", "fats", "carbohydrates")
+
+
+def per_serving_vectors(recipe_ids=None):
+    """
+    Computes the per-serving (calories, proteins, fats, carbohydrates) vector of each recipe
+    with a single aggregate query, instead of walking recipeingredient_set per recipe.
+    """
+    recipes = Recipe.objects.all()
+    rows = RecipeIngredient.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+        rows = rows.filter(recipe_id__in=recipe_ids)
+
+    servings = dict(recipes.values_list("pk", "servings"))
+    totals = dict.fromkeys(servings, (0.0, 0.0, 0.0, 0.0))
+    aggregates = {
+        nutrient: Sum(
+            ExpressionWrapper(
+                F("quantity") * F(f"ingredient__{nutrient}"),
+                output_field=DecimalField(),
+            )
+        )
+        for nutrient in NUTRIENTS
+    }
+    for row in rows.values("recipe_id").annotate(**aggregates).order_by():
+        if row["recipe_id"] in totals:
+            totals[row["recipe_id"]] = tuple(float(row[n] or 0) for n in NUTRIENTS)
+
+    return {
+        recipe_id: (
+            tuple(t / servings[recipe_id] for t in total)
+            if servings[recipe_id]
+            else (0.0, 0.0, 0.0, 0.0)
+        )
+        for recipe_id, total in totals.items()
+    }
+
+
+class NutritionIndex:
+    """
+    In-memory index of per-serving nutrition vectors for nearest-neighbour recipe search.
+
+    The index remembers the SyncClock value it was built at and, before each search, only
+    reloads the RecipeNutrition rows the recompute worker has written since then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.vectors = {}
+        self.version = None
+        self._ids = None
+        self._matrix = None
+
+    def invalidate(self):
+        """
+        Drops all vectors so the next search rebuilds the index from scratch.
+        """
+        with self._lock:
+            self.vectors = {}
+            self.version = self._ids = self._matrix = None
+
+    def refresh(self):
+        """
+        Brings the index up to date with the precomputed RecipeNutrition rows.
+        """
+        with self._lock:
+            current = SyncClock.objects.values_list("value", flat=True).first() or 0
+            if current == self.version:
+                return
+            # Updates go into a copy that is swapped in at the end, so searches iterating
+            # a snapshot of the previous vectors are never disturbed.
+            rows = RecipeNutrition.objects.values_list("recipe_id", *NUTRIENTS)
+            if self.version is None:
+                vectors = {}
+            else:
+                vectors = dict(self.vectors)
+                rows = rows.filter(version__gt=self.version)
+                deleted = Tombstone.objects.filter(
+                    model=Recipe._meta.model_name, version__gt=self.version
+                ).values_list("object_id", flat=True)
+                for recipe_id in deleted:
+                    vectors.pop(recipe_id, None)
+            for recipe_id, *vector in rows:
+                vectors[recipe_id] = tuple(vector)
+            self.vectors = vectors
+            self.version = current
+            self._ids = self._matrix = None
+
+    def snapshot(self, np=None):
+        """
+        Returns a consistent (vectors, ids, matrix) view of the index. The ids and matrix
+        are only built, and otherwise None, when NumPy is passed in.
+        """
+        with self._lock:
+            if np is not None and self._matrix is None:
+                ids = np.fromiter(self.vectors.keys(), dtype=np.int64)
+                matrix = np.array(list(self.vectors.values()), dtype=np.float64)
+                self._ids = ids
+                self._matrix = matrix.reshape(len(ids), len(NUTRIENTS))
+            return self.vectors, self._ids, self._matrix
+
+    def search(self, target, k=20, weights=None, candidates=None):
+        """
+        Returns up to k (recipe_id, distance) pairs closest to the target vector by weighted
+        Euclidean distance. `candidates` optionally restricts the search to a set of recipe ids.
+        """
+        self.refresh()
+        weights = weights or (1.0,) * len(NUTRIENTS)
+        np = optional_import("numpy")
+        vectors, ids, matrix = self.snapshot(np)
+        if np is not None:
+            return self._search_numpy(np, ids, matrix, target, k, weights, candidates)
+
+        def distance(vector):
+            return (
+                sum(w * (v - t) ** 2 for v, t, w in zip(vector, target, weights)) ** 0.5
+            )
+
+        items = vectors.items()
+        if candidates is not None:
+            items = ((i, v) for i, v in items if i in candidates)
+        scored = ((recipe_id, distance(vector)) for recipe_id, vector in items)
+        return nsmallest(k, scored, key=lambda item: (item[1], item[0]))
+
+    def _search_numpy(self, np, ids, matrix, target, k, weights, candidates):
+        if candidates is not None:
+            mask = np.isin(ids, np.fromiter(candidates, dtype=np.int64))
+            ids, matrix = ids[mask], matrix[mask]
+        if not len(ids):
+            return []
+        diff = matrix - np.asarray(target, dtype=np.float64)
+        distances = np.sqrt((diff * diff) @ np.asarray(weights, dtype=np.float64))
+        k = min(k, len(ids))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.lexsort((ids[nearest], distances[nearest]))]
+        return [(int(ids[i]), float(distances[i])) for i in nearest]
+
+
+nutrition_index = NutritionIndex()
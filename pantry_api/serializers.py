@@ -1,5 +1,11 @@
 from rest_framework import serializers
-from .models import Ingredient, Recipe, RecipeIngredient, MeasurementUnit
+from .models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    MeasurementUnit,
+    RecomputeJob,
+)
 
 
 class MeasurementUnitSerializer(serializers.ModelSerializer):
@@ -32,6 +38,27 @@ class IngredientSerializer(serializers.ModelSerializer):
         ]
 
 
+class IngredientStatsSerializer(IngredientSerializer):
+    """
+    Ingredient serializer extended with the precomputed usage counters.
+    """
+
+    recipe_count = serializers.IntegerField(source="usage.recipe_count", read_only=True)
+    total_quantity = serializers.DecimalField(
+        source="usage.total_quantity", max_digits=12, decimal_places=2, read_only=True
+    )
+    average_quantity = serializers.DecimalField(
+        source="usage.average_quantity", max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + [
+            "recipe_count",
+            "total_quantity",
+            "average_quantity",
+        ]
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """
     Serializer for Recipe model, integrating ingredients with their quantities and measurement units.
@@ -62,3 +89,21 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ["id", "recipe", "ingredient", "quantity"]
+
+
+class RecomputeJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for queued recompute jobs and their status.
+    """
+
+    class Meta:
+        model = RecomputeJob
+        fields = [
+            "id",
+            "kind",
+            "target_id",
+            "status",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
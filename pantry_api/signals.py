@@ -0,0 +1,131 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .jobs import enqueue
+from .models import (
+    Ingredient,
+    IngredientUsage,
+    MeasurementUnit,
+    Recipe,
+    RecipeIngredient,
+    RecomputeJob,
+    SyncClock,
+    Tombstone,
+)
+from .usage import apply_usage_change, to_quantity
+
+SYNCED_MODELS = (MeasurementUnit, Ingredient, Recipe, RecipeIngredient)
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """
+    Leaves a tombstone for every deleted synced row, including cascaded deletes.
+    """
+    Tombstone.objects.create(
+        model=sender._meta.model_name, object_id=instance.pk, version=SyncClock.tick()
+    )
+
+
+# Connected per model rather than for every sender: a post_delete receiver stops Django
+# from fast-deleting a model, which would slow bulk deletes of derived data to a crawl.
+for model in SYNCED_MODELS:
+    post_delete.connect(record_tombstone, sender=model)
+
+
+@receiver(pre_delete, sender=MeasurementUnit)
+def bump_orphaned_ingredients(sender, instance, **kwargs):
+    """
+    Ingredients lose their unit through SET_NULL, which bypasses save(), so their version
+    is bumped here before the unit goes away. Each row gets its own version because the sync
+    cursor assumes no two rows share one.
+    """
+    orphaned = Ingredient.objects.filter(measurement_unit=instance)
+    for pk in orphaned.values_list("pk", flat=True):
+        Ingredient.objects.filter(pk=pk).update(version=SyncClock.tick())
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def bump_recipe_version(sender, instance, **kwargs):
+    """
+    A recipe's ingredients and nutrition totals change with its RecipeIngredient rows, so
+    the parent recipe is versioned as changed too.
+    """
+    Recipe.objects.filter(pk=instance.recipe_id).update(version=SyncClock.tick())
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def queue_recipe_recompute(sender, instance, **kwargs):
+    """
+    Queues the recipe's nutrition and MinHash signature for recomputation.
+    """
+    enqueue(RecomputeJob.RECIPE_NUTRITION, [instance.recipe_id])
+    enqueue(RecomputeJob.RECIPE_SIGNATURE, [instance.recipe_id])
+
+
+@receiver(post_save, sender=Recipe)
+def queue_recipe_nutrition(sender, instance, **kwargs):
+    """
+    Servings feed the per-serving nutrition, so recipe saves queue a recomputation.
+    """
+    enqueue(RecomputeJob.RECIPE_NUTRITION, [instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+def queue_ingredient_dependants(sender, instance, created, **kwargs):
+    """
+    Queues a single job for an edited ingredient. The worker fans it out to the recipes
+    using it (nutrition and sync versions), so updating a staple does not touch thousands of
+    recipes in the request.
+    """
+    if not created:
+        enqueue(RecomputeJob.INGREDIENT, [instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+def create_ingredient_usage(sender, instance, created, **kwargs):
+    """
+    Every ingredient gets a usage row so its counters can be updated in place and sorted on.
+    """
+    if created:
+        IngredientUsage.objects.create(ingredient=instance)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_previous_usage(sender, instance, **kwargs):
+    """
+    Stores the row's previous ingredient and quantity so post_save can apply the difference.
+    """
+    instance._previous_usage = (
+        RecipeIngredient.objects.filter(pk=instance.pk)
+        .values_list("ingredient_id", "quantity")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def update_ingredient_usage(sender, instance, **kwargs):
+    """
+    Applies a created or updated RecipeIngredient to its ingredients' usage counters.
+    """
+    previous = getattr(instance, "_previous_usage", None)
+    quantity = to_quantity(instance.quantity)
+    if previous is None:
+        apply_usage_change(instance.ingredient_id, 1, quantity)
+        return
+    previous_ingredient_id, previous_quantity = previous
+    if previous_ingredient_id == instance.ingredient_id:
+        apply_usage_change(previous_ingredient_id, 0, quantity - previous_quantity)
+    else:
+        apply_usage_change(previous_ingredient_id, -1, -previous_quantity)
+        apply_usage_change(instance.ingredient_id, 1, quantity)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def release_ingredient_usage(sender, instance, **kwargs):
+    """
+    Removes a deleted RecipeIngredient from its ingredient's usage counters.
+    """
+    apply_usage_change(instance.ingredient_id, -1, -to_quantity(instance.quantity))
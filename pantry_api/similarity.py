@@ -0,0 +1,116 @@
+import hashlib
+import random
+from django.db import transaction
+from .models import RecipeIngredient, RecipeSignature, SignatureBucket
+
+# 16 bands of 4 rows put the LSH similarity threshold near a Jaccard index of 0.5.
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240406)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+]
+
+
+def minhash(ingredient_ids):
+    """
+    Returns the MinHash signature of a non-empty set of ingredient ids.
+    """
+    return [min((a * i + b) % _PRIME for i in ingredient_ids) for a, b in _PERMUTATIONS]
+
+
+def bucket_keys(signature):
+    """
+    Hashes each band of a signature, together with its band number, into a signed 64-bit key.
+    """
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS]
+        digest = hashlib.blake2b(repr((band, rows)).encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def estimate_similarity(first, second):
+    """
+    Estimates the Jaccard index of two ingredient sets from their signatures.
+    """
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def _signature_rows(recipe_id, ingredient_ids):
+    signature = minhash(ingredient_ids)
+    buckets = [
+        SignatureBucket(recipe_id=recipe_id, key=key) for key in bucket_keys(signature)
+    ]
+    return RecipeSignature(recipe_id=recipe_id, signature=signature), buckets
+
+
+def _replace_signatures(recipe_ids, batch_size):
+    """
+    Replaces the signatures and buckets of the given recipes (all recipes when None) with
+    ones computed from a single pass over their RecipeIngredient rows.
+    """
+    rows = RecipeIngredient.objects.values_list("recipe_id", "ingredient_id")
+    signatures = RecipeSignature.objects.all()
+    buckets = SignatureBucket.objects.all()
+    if recipe_ids is not None:
+        rows = rows.filter(recipe_id__in=recipe_ids)
+        signatures = signatures.filter(recipe_id__in=recipe_ids)
+        buckets = buckets.filter(recipe_id__in=recipe_ids)
+
+    with transaction.atomic():
+        ingredient_sets = {}
+        for recipe_id, ingredient_id in rows.iterator(chunk_size=batch_size):
+            ingredient_sets.setdefault(recipe_id, set()).add(ingredient_id)
+        buckets.delete()
+        signatures.delete()
+        new_signatures, new_buckets = [], []
+        for recipe_id, ingredient_ids in ingredient_sets.items():
+            signature, recipe_buckets = _signature_rows(recipe_id, ingredient_ids)
+            new_signatures.append(signature)
+            new_buckets.extend(recipe_buckets)
+        RecipeSignature.objects.bulk_create(new_signatures, batch_size=batch_size)
+        SignatureBucket.objects.bulk_create(new_buckets, batch_size=batch_size)
+    return len(new_signatures)
+
+
+def update_signatures(recipe_ids, batch_size=1000):
+    """
+    Recomputes the signatures and buckets of the given recipes from their current ingredients.
+    Recipes that no longer exist or have no ingredients are dropped from the index.
+    """
+    return _replace_signatures(list(recipe_ids), batch_size)
+
+
+def rebuild_signatures(batch_size=1000):
+    """
+    Rebuilds every signature. Returns the number of recipes indexed.
+    """
+    return _replace_signatures(None, batch_size)
+
+
+def similar_recipes(recipe_id, n=10):
+    """
+    Returns up to n (recipe_id, similarity) pairs for the recipes whose ingredients overlap
+    most with the given recipe. Only recipes sharing an LSH bucket are compared.
+    """
+    try:
+        signature = RecipeSignature.objects.get(recipe_id=recipe_id).signature
+    except RecipeSignature.DoesNotExist:
+        return []
+    candidates = (
+        SignatureBucket.objects.filter(key__in=bucket_keys(signature))
+        .exclude(recipe_id=recipe_id)
+        .values_list("recipe_id", flat=True)
+        .distinct()
+    )
+    scored = [
+        (candidate.recipe_id, estimate_similarity(signature, candidate.signature))
+        for candidate in RecipeSignature.objects.filter(recipe_id__in=list(candidates))
+    ]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:n]
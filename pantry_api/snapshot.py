@@ -0,0 +1,284 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from .models import Ingredient, MeasurementUnit, Recipe, RecipeIngredient
+from .utils import optional_import
+
+MAGIC = b"PANTRYS1"
+_HEADER_LENGTH = struct.Struct("<I")
+_ALIGNMENT = 8
+
+# Table name -> (queryset, [(column name, value_list field, array typecode)], name field).
+# Ids, foreign keys and integer counts are int64 ("q"), quantities and macros float64 ("d").
+# A missing measurement unit is stored as -1.
+TABLES = {
+    "measurementunits": (
+        MeasurementUnit.objects.order_by("pk"),
+        [("id", "pk", "q")],
+        "name",
+    ),
+    "ingredients": (
+        Ingredient.objects.order_by("pk"),
+        [
+            ("id", "pk", "q"),
+            ("calories", "calories", "q"),
+            ("fats", "fats", "d"),
+            ("proteins", "proteins", "d"),
+            ("carbohydrates", "carbohydrates", "d"),
+            ("measurement_unit_id", "measurement_unit_id", "q"),
+        ],
+        "name",
+    ),
+    "recipes": (
+        Recipe.objects.order_by("pk"),
+        [("id", "pk", "q"), ("servings", "servings", "q")],
+        "name",
+    ),
+    "recipeingredients": (
+        RecipeIngredient.objects.order_by("pk"),
+        [
+            ("id", "pk", "q"),
+            ("recipe_id", "recipe_id", "q"),
+            ("ingredient_id", "ingredient_id", "q"),
+            ("quantity", "quantity", "d"),
+        ],
+        None,
+    ),
+}
+
+
+# Foreign key columns and the table they point at. Tables are read in TABLES order, so the
+# referenced ids are known by the time a referencing row is read.
+REFERENCES = {
+    "ingredients": {"measurement_unit_id": "measurementunits"},
+    "recipeingredients": {"recipe_id": "recipes", "ingredient_id": "ingredients"},
+}
+NULLABLE_REFERENCES = {"measurement_unit_id"}
+
+
+def _read_tables(chunk_size):
+    """
+    Reads every table into typed column bytes. Rows whose required references are missing
+    from the snapshot are dropped, and a missing measurement unit is stored as -1, so the
+    arrays are always self-consistent.
+    """
+    columns = {}
+    counts = {}
+    exported_ids = {}
+    for table, (queryset, specs, name_field) in TABLES.items():
+        fields = [field for _, field, _ in specs] + ([name_field] if name_field else [])
+        arrays = {column: array(typecode) for column, _, typecode in specs}
+        names, name_offsets = bytearray(), array("q", [0])
+        references = REFERENCES.get(table, {})
+        ids = exported_ids[table] = set()
+        for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+            values = dict(zip((column for column, _, _ in specs), row))
+            dangling = [
+                column
+                for column, target in references.items()
+                if values[column] is not None
+                and values[column] not in exported_ids[target]
+            ]
+            if any(column not in NULLABLE_REFERENCES for column in dangling):
+                continue
+            for column in dangling:
+                values[column] = None
+            for column, _, typecode in specs:
+                value = -1 if values[column] is None else values[column]
+                arrays[column].append(float(value) if typecode == "d" else value)
+            if name_field:
+                names += row[-1].encode()
+                name_offsets.append(len(names))
+            ids.add(values["id"])
+        for column, values in arrays.items():
+            columns[(table, column)] = (values.typecode, values.tobytes())
+        if name_field:
+            columns[(table, "name_offsets")] = ("q", name_offsets.tobytes())
+            columns[(table, "names")] = ("B", bytes(names))
+        counts[table] = len(ids)
+    return columns, counts
+
+
+def write_snapshot(path, chunk_size=2000):
+    """
+    Writes every synced table to a single columnar snapshot file and returns the row count
+    per table. The file is replaced atomically, so readers never see a partial snapshot.
+    All tables are read in one transaction (REPEATABLE READ on PostgreSQL) so they describe
+    the same point in time.
+
+    Layout: magic, a little-endian uint32 header length, a JSON header describing each
+    column's offset, length and typecode, then the 8-byte aligned column data. Names are
+    stored as a UTF-8 blob plus an int64 offsets column with one more entry than rows.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        columns, counts = _read_tables(chunk_size)
+
+    header = {"byteorder": sys.byteorder, "counts": counts, "columns": {}}
+    offset = 0
+    for (table, column), (typecode, data) in columns.items():
+        header["columns"].setdefault(table, {})[column] = {
+            "offset": offset,
+            "length": len(data),
+            "typecode": typecode,
+        }
+        offset += _padded(len(data))
+    header_bytes = json.dumps(header).encode()
+    data_start = _padded(len(MAGIC) + _HEADER_LENGTH.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(MAGIC + _HEADER_LENGTH.pack(len(header_bytes)) + header_bytes)
+        out.write(b"\0" * (data_start - out.tell()))
+        for typecode, data in columns.values():
+            out.write(data)
+            out.write(b"\0" * (_padded(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+    return counts
+
+
+def _padded(length):
+    return -(-length // _ALIGNMENT) * _ALIGNMENT
+
+
+class StringTable:
+    """
+    Lazily decoded names backed by the snapshot's offsets and UTF-8 blob.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("string table index out of range")
+        index %= len(self)
+        return bytes(self.blob[self.offsets[index] : self.offsets[index + 1]]).decode()
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+class NutritionSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot written by write_snapshot.
+
+    Columns are memoryviews cast to their typecode, so reading them copies nothing and only
+    touches the pages that are used. Column views must not be used after the snapshot is
+    closed; NumPy arrays from array() may outlive it.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        if self._buffer[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a nutrition snapshot.")
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._buffer, len(MAGIC))
+        header_start = len(MAGIC) + _HEADER_LENGTH.size
+        header = json.loads(
+            bytes(self._buffer[header_start : header_start + header_length])
+        )
+        if header["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(
+                f"{path} was written on a {header['byteorder']}-endian host."
+            )
+        self.counts = header["counts"]
+        self._columns = header["columns"]
+        self._data_start = _padded(header_start + header_length)
+        self._views = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _view(self, table, name):
+        spec = self._columns[table][name]
+        start = self._data_start + spec["offset"]
+        return self._buffer[start : start + spec["length"]].cast(spec["typecode"])
+
+    def column(self, table, name):
+        """
+        Returns a zero-copy typed memoryview over one column. It is released on close().
+        """
+        view = self._view(table, name)
+        self._views.append(view)
+        return view
+
+    def array(self, table, name):
+        """
+        Returns a column as a read-only NumPy array sharing the mapped memory. The array stays
+        valid after close(); the file is unmapped once the last such array is garbage collected.
+        """
+        np = optional_import("numpy")
+        if np is None:
+            raise ImproperlyConfigured(
+                "NumPy is required for NutritionSnapshot.array()."
+            )
+        return np.frombuffer(
+            self._view(table, name), dtype=self._columns[table][name]["typecode"]
+        )
+
+    def names(self, table):
+        """
+        Returns the names of a table's rows, in the same order as its columns.
+        """
+        return StringTable(
+            self.column(table, "name_offsets"), self.column(table, "names")
+        )
+
+    def close(self):
+        """
+        Releases the column views. The mapping itself is closed now unless arrays returned
+        by array() still reference it, in which case it is closed when they are collected.
+        """
+        for view in getattr(self, "_views", []):
+            view.release()
+        self._views = []
+        self._buffer.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+def recipe_totals(snapshot):
+    """
+    Computes each recipe's total (calories, proteins, fats, carbohydrates) from a snapshot
+    without touching the database.
+    """
+    ingredient_ids = snapshot.column("ingredients", "id")
+    position = {ingredient_id: i for i, ingredient_id in enumerate(ingredient_ids)}
+    macros = [
+        snapshot.column("ingredients", name)
+        for name in ("calories", "proteins", "fats", "carbohydrates")
+    ]
+    totals = dict.fromkeys(snapshot.column("recipes", "id"), (0.0, 0.0, 0.0, 0.0))
+    rows = zip(
+        snapshot.column("recipeingredients", "recipe_id"),
+        snapshot.column("recipeingredients", "ingredient_id"),
+        snapshot.column("recipeingredients", "quantity"),
+    )
+    for recipe_id, ingredient_id, quantity in rows:
+        i = position[ingredient_id]
+        totals[recipe_id] = tuple(
+            total + quantity * column[i]
+            for total, column in zip(totals[recipe_id], macros)
+        )
+    return totals
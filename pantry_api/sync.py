@@ -0,0 +1,116 @@
+import base64
+import binascii
+from heapq import nsmallest
+from rest_framework.exceptions import ValidationError
+from .models import (
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    RecipeIngredient,
+    SyncClock,
+    Tombstone,
+)
+from .serializers import (
+    IngredientSerializer,
+    MeasurementUnitSerializer,
+    RecipeIngredientSerializer,
+    RecipeSerializer,
+)
+
+# Resource name (as registered on the router) -> model, serializer and queryset tweaks.
+SYNC_RESOURCES = {
+    "measurementunits": (MeasurementUnit, MeasurementUnitSerializer, ()),
+    "ingredients": (Ingredient, IngredientSerializer, ("measurement_unit",)),
+    "recipes": (Recipe, RecipeSerializer, ()),
+    "recipeingredients": (RecipeIngredient, RecipeIngredientSerializer, ()),
+}
+
+RECIPE_PREFETCH = ("ingredients__measurement_unit", "recipeingredient_set__ingredient")
+
+
+def encode_cursor(version):
+    """
+    Wraps a sync version in an opaque cursor string.
+    """
+    return base64.urlsafe_b64encode(f"v{version}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Turns a cursor back into a version. An empty cursor means a full sync from scratch and
+    decodes to None, so rows that still carry the default version are included as well.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        if not raw.startswith("v"):
+            raise ValueError
+        return int(raw[1:])
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({"cursor": "Invalid sync cursor."})
+
+
+def stamp_unversioned_rows():
+    """
+    Gives rows written without save() (bulk_create, raw fixture loads) a version of their
+    own. Without one they would share the default version 0 and never match a cursor.
+    """
+    for model, _, _ in SYNC_RESOURCES.values():
+        for pk in model.objects.filter(version=0).values_list("pk", flat=True):
+            model.objects.filter(pk=pk, version=0).update(version=SyncClock.tick())
+
+
+def collect_changes(since, limit):
+    """
+    Returns up to `limit` changes (rows and tombstones) with a version above `since` (or
+    every change when `since` is None), in version order, along with the cursor to resume
+    from and whether more changes remain. Every change carries a distinct version, so a page
+    never ends partway through one.
+    """
+    stamp_unversioned_rows()
+    candidates = []
+    for resource, (model, _, select) in SYNC_RESOURCES.items():
+        queryset = model.objects.order_by("version")
+        if since is not None:
+            queryset = queryset.filter(version__gt=since)
+        if select:
+            queryset = queryset.select_related(*select)
+        if model is Recipe:
+            queryset = queryset.prefetch_related(*RECIPE_PREFETCH)
+        candidates.extend((obj.version, resource, obj) for obj in queryset[: limit + 1])
+    model_to_resource = {
+        model._meta.model_name: resource
+        for resource, (model, _, _) in SYNC_RESOURCES.items()
+    }
+    tombstones = Tombstone.objects.order_by("version")
+    if since is not None:
+        tombstones = tombstones.filter(version__gt=since)
+    candidates.extend(
+        (tombstone.version, model_to_resource.get(tombstone.model), tombstone)
+        for tombstone in tombstones[: limit + 1]
+    )
+
+    batch = nsmallest(limit, candidates, key=lambda item: item[0])
+    has_more = len(candidates) > len(batch)
+
+    changed = {resource: [] for resource in SYNC_RESOURCES}
+    deleted = {resource: [] for resource in SYNC_RESOURCES}
+    for _, resource, obj in batch:
+        if isinstance(obj, Tombstone):
+            if resource is not None:
+                deleted[resource].append(obj.object_id)
+        else:
+            changed[resource].append(obj)
+
+    for resource, objs in changed.items():
+        serializer_class = SYNC_RESOURCES[resource][1]
+        changed[resource] = serializer_class(objs, many=True).data
+
+    cursor_version = batch[-1][0] if batch else since or 0
+    return {
+        "cursor": encode_cursor(cursor_version),
+        "has_more": has_more,
+        "changed": changed,
+        "deleted": deleted,
+    }
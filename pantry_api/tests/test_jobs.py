@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from pantry_api.jobs import (
+    HANDLERS,
+    process_all,
+    process_batch,
+    prune_finished_jobs,
+    requeue_stale_jobs,
+)
+from pantry_api.models import Recipe, Ingredient, RecipeIngredient, RecipeNutrition, RecomputeJob
+
+class RecomputeJobTest(TestCase):
+    """Tests for the recompute job queue."""
+
+    def setUp(self):
+        self.butter = Ingredient.objects.create(name="Butter", calories=717, fats=81)
+        self.recipes = [
+            Recipe.objects.create(name=f"Shortbread {i}", instructions="Bake.", servings=1)
+            for i in range(3)
+        ]
+        for recipe in self.recipes:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=self.butter, quantity=1)
+        process_all()
+
+    def test_pending_jobs_coalesce(self):
+        """Test that repeated changes to a recipe share one pending job."""
+        recipe = self.recipes[0]
+        for quantity in (2, 3, 4):
+            RecipeIngredient.objects.filter(recipe=recipe).update(quantity=quantity)
+            recipe.save()
+        pending = RecomputeJob.objects.filter(status=RecomputeJob.PENDING)
+        self.assertEqual(pending.count(), 1)
+        process_all()
+        self.assertEqual(RecipeNutrition.objects.get(recipe=recipe).calories, 717 * 4)
+
+    def test_ingredient_update_fans_out(self):
+        """Test that an ingredient job fans out to the recipes using it."""
+        self.butter.calories = 700
+        self.butter.save()
+        self.assertEqual(
+            list(RecomputeJob.objects.filter(status=RecomputeJob.PENDING).values_list("kind", flat=True)),
+            [RecomputeJob.INGREDIENT],
+        )
+        process_all()
+        self.assertEqual(
+            list(RecipeNutrition.objects.values_list("calories", flat=True).distinct()), [700.0]
+        )
+
+    def test_failed_jobs_are_recorded(self):
+        """Test that a failing handler marks its job failed with the traceback."""
+        self.recipes[0].save()
+        failing = mock.Mock(side_effect=RuntimeError("boom"))
+        with mock.patch.dict(HANDLERS, {RecomputeJob.RECIPE_NUTRITION: failing}):
+            self.assertEqual(process_batch(), 1)
+        job = RecomputeJob.objects.get(status=RecomputeJob.FAILED)
+        self.assertIn("boom", job.error)
+
+    def test_failure_only_fails_its_own_target(self):
+        """Test that one failing target does not fail the rest of its batch."""
+        for recipe in self.recipes:
+            recipe.save()
+        bad_id = self.recipes[1].id
+        handler = HANDLERS[RecomputeJob.RECIPE_NUTRITION]
+
+        def flaky(recipe_ids):
+            if bad_id in recipe_ids:
+                raise RuntimeError("boom")
+            handler(recipe_ids)
+
+        with mock.patch.dict(HANDLERS, {RecomputeJob.RECIPE_NUTRITION: flaky}):
+            process_all()
+        failed = RecomputeJob.objects.filter(status=RecomputeJob.FAILED)
+        self.assertEqual(list(failed.values_list("target_id", flat=True)), [bad_id])
+        self.assertEqual(
+            RecomputeJob.objects.filter(kind=RecomputeJob.RECIPE_NUTRITION, status=RecomputeJob.DONE).count(), 5
+        )
+
+    def test_prune_finished_jobs(self):
+        """Test deleting finished jobs past their retention."""
+        self.recipes[0].save()
+        finished = RecomputeJob.objects.exclude(status=RecomputeJob.PENDING)
+        finished.update(updated_at=timezone.now() - timedelta(days=8))
+        stale = finished.count()
+        self.assertEqual(prune_finished_jobs(timedelta(days=7)), stale)
+        self.assertEqual(RecomputeJob.objects.count(), 1)
+        self.assertEqual(prune_finished_jobs(timedelta(days=7)), 0)
+
+    def test_stale_running_jobs_are_requeued(self):
+        """Test requeueing jobs left running by a crashed worker."""
+        stale_time = timezone.now() - timedelta(hours=1)
+        crashed = RecomputeJob.objects.create(
+            kind=RecomputeJob.RECIPE_NUTRITION, target_id=self.recipes[0].id, status=RecomputeJob.RUNNING
+        )
+        covered = RecomputeJob.objects.create(
+            kind=RecomputeJob.RECIPE_NUTRITION, target_id=self.recipes[1].id, status=RecomputeJob.RUNNING
+        )
+        RecomputeJob.objects.filter(pk__in=[crashed.pk, covered.pk]).update(updated_at=stale_time)
+        RecomputeJob.objects.create(kind=RecomputeJob.RECIPE_NUTRITION, target_id=self.recipes[1].id)
+        running = RecomputeJob.objects.create(
+            kind=RecomputeJob.RECIPE_NUTRITION, target_id=self.recipes[2].id, status=RecomputeJob.RUNNING
+        )
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=15)), 1)
+        crashed.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(crashed.status, RecomputeJob.PENDING)
+        self.assertEqual(running.status, RecomputeJob.RUNNING)
+        self.assertFalse(RecomputeJob.objects.filter(pk=covered.pk).exists())
+        self.assertEqual(process_all(), 2)
+
+    def test_duplicate_stale_jobs_requeue_once(self):
+        """Test that stale jobs for the same target are requeued only once."""
+        for _ in range(2):
+            RecomputeJob.objects.create(
+                kind=RecomputeJob.RECIPE_SIGNATURE, target_id=self.recipes[0].id, status=RecomputeJob.RUNNING
+            )
+        RecomputeJob.objects.filter(status=RecomputeJob.RUNNING).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=15)), 1)
+        self.assertEqual(RecomputeJob.objects.filter(status=RecomputeJob.PENDING).count(), 1)
+        self.assertFalse(RecomputeJob.objects.filter(status=RecomputeJob.RUNNING).exists())
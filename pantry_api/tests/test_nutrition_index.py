@@ -0,0 +1,67 @@
+from django.test import TestCase
+from pantry_api.models import Recipe, Ingredient, RecipeIngredient
+from pantry_api.jobs import process_all
+from pantry_api.nutrition_index import NutritionIndex, per_serving_vectors
+
+class NutritionIndexTest(TestCase):
+    """Tests for the per-serving nutrition vector index."""
+
+    def setUp(self):
+        self.chicken = Ingredient.objects.create(
+            name="Chicken", calories=165, fats=4, proteins=31, carbohydrates=0
+        )
+        self.rice = Ingredient.objects.create(
+            name="Rice", calories=130, fats=0, proteins=3, carbohydrates=28
+        )
+        self.bowl = Recipe.objects.create(name="Chicken Bowl", instructions="Assemble.", servings=2)
+        RecipeIngredient.objects.create(recipe=self.bowl, ingredient=self.chicken, quantity=2)
+        RecipeIngredient.objects.create(recipe=self.bowl, ingredient=self.rice, quantity=2)
+        self.plain_rice = Recipe.objects.create(name="Plain Rice", instructions="Boil.", servings=1)
+        RecipeIngredient.objects.create(recipe=self.plain_rice, ingredient=self.rice, quantity=1)
+        process_all()
+        self.index = NutritionIndex()
+
+    def test_per_serving_vectors_match_model_properties(self):
+        """Test that the aggregate per-serving vectors match the recipe properties."""
+        vectors = per_serving_vectors()
+        self.assertEqual(vectors[self.bowl.id][0], float(self.bowl.calories_per_serving))
+        self.assertEqual(vectors[self.bowl.id][1], float(self.bowl.total_proteins) / 2)
+        self.assertEqual(vectors[self.plain_rice.id], (130.0, 3.0, 0.0, 28.0))
+
+    def test_search_orders_by_distance(self):
+        """Test that search results are ordered by distance to the target."""
+        results = self.index.search([130, 3, 0, 28], k=2)
+        self.assertEqual([recipe_id for recipe_id, _ in results], [self.plain_rice.id, self.bowl.id])
+        self.assertEqual(results[0][1], 0.0)
+
+    def test_search_with_candidates(self):
+        """Test restricting a search to candidate recipes."""
+        results = self.index.search([130, 3, 0, 28], k=2, candidates={self.bowl.id})
+        self.assertEqual([recipe_id for recipe_id, _ in results], [self.bowl.id])
+
+    def test_refresh_picks_up_changes(self):
+        """Test that a refresh applies recomputed, emptied and deleted recipes."""
+        self.index.search([0, 0, 0, 0])
+        self.rice.calories = 200
+        self.rice.save()
+        RecipeIngredient.objects.filter(recipe=self.bowl, ingredient=self.chicken).delete()
+        plain_rice_id = self.plain_rice.id
+        deleted = Recipe.objects.create(name="Water", instructions="Pour.", servings=1)
+        deleted.delete()
+        process_all()
+
+        self.index.refresh()
+        self.assertEqual(self.index.vectors[plain_rice_id][0], 200.0)
+        self.assertEqual(self.index.vectors[self.bowl.id], (200.0, 3.0, 0.0, 28.0))
+        self.assertEqual(set(self.index.vectors), {self.bowl.id, plain_rice_id})
+
+    def test_refresh_leaves_snapshots_untouched(self):
+        """Test that a refresh swaps in new vectors instead of changing a taken snapshot."""
+        self.index.refresh()
+        vectors, _, _ = self.index.snapshot()
+        plain_rice_id = self.plain_rice.id
+        self.plain_rice.delete()
+        process_all()
+        self.index.refresh()
+        self.assertIn(plain_rice_id, vectors)
+        self.assertEqual(set(self.index.vectors), {self.bowl.id})
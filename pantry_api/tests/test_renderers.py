@@ -0,0 +1,84 @@
+import gzip
+from io import BytesIO
+from datetime import datetime, timezone
+from decimal import Decimal
+import zlib
+from unittest import mock, skipIf
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from pantry_api.middleware import CompressionMiddleware, brotli
+from pantry_api.renderers import ORJSONParser, ORJSONRenderer
+
+class ORJSONRendererTest(SimpleTestCase):
+    """Tests for the orjson-backed renderer and parser."""
+
+    data = {
+        "name": "Café   Latte",
+        "total_fats": Decimal("12.50"),
+        "created_at": datetime(2024, 4, 6, 14, 55, tzinfo=timezone.utc),
+        "ingredients": [{"id": 1, "fats": "0.00"}],
+        1: None,
+    }
+
+    def test_matches_default_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indent_falls_back(self):
+        rendered = ORJSONRenderer().render(self.data, "application/json; indent=4")
+        self.assertEqual(rendered, JSONRenderer().render(self.data, "application/json; indent=4"))
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_parser(self):
+        body = b'{"name": "Oats", "quantity": 1.5}'
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body))
+        )
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"name": '))
+
+
+@override_settings(API_COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTest(SimpleTestCase):
+    """Tests for the response compression middleware."""
+
+    def compress(self, content, accept_encoding="gzip, deflate", content_type="application/json"):
+        request = RequestFactory().get("/api/recipes/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = HttpResponse(content, content_type=content_type)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def test_large_response_is_gzipped(self):
+        content = b'{"name": "Pancakes"}' * 50
+        response = self.compress(content)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), content)
+
+    def test_small_response_is_not_compressed(self):
+        response = self.compress(b'{"name": "Pancakes"}')
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_without_accept_encoding(self):
+        response = self.compress(b'{"name": "Pancakes"}' * 50, accept_encoding="")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_preferred_when_accepted(self):
+        content = b'{"name": "Pancakes"}' * 50
+        response = self.compress(content, accept_encoding="gzip, br")
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), content)
+
+    def test_brotli_only_for_json(self):
+        fake_brotli = mock.Mock(compress=lambda content, quality: zlib.compress(content))
+        content = b'<input name="csrfmiddlewaretoken" value="secret">' * 50
+        with mock.patch("pantry_api.middleware.brotli", fake_brotli):
+            json_response = self.compress(content, accept_encoding="gzip, br")
+            html_response = self.compress(content, accept_encoding="gzip, br", content_type="text/html")
+        self.assertEqual(json_response.headers["Content-Encoding"], "br")
+        self.assertEqual(html_response.headers["Content-Encoding"], "gzip")
@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from pantry_api.models import Recipe, Ingredient, RecipeIngredient, RecipeSignature, SignatureBucket
+from pantry_api.jobs import process_all
+from pantry_api.similarity import minhash, estimate_similarity, similar_recipes
+
+class SimilarityTest(TestCase):
+    """Tests for the MinHash/LSH similar-recipe index."""
+
+    def setUp(self):
+        self.ingredients = [
+            Ingredient.objects.create(name=f"Ingredient {i}", calories=10) for i in range(8)
+        ]
+        self.pancakes = self.make_recipe("Pancakes", self.ingredients[:6])
+        self.crepes = self.make_recipe("Crepes", self.ingredients[:5])
+        self.salad = self.make_recipe("Salad", self.ingredients[6:])
+
+    def make_recipe(self, name, ingredients):
+        recipe = Recipe.objects.create(name=name, instructions="Cook.", servings=1)
+        for ingredient in ingredients:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=1)
+        process_all()
+        return recipe
+
+    def test_signature_estimates_jaccard(self):
+        """Test that MinHash signatures estimate the Jaccard similarity of ingredient sets."""
+        self.assertEqual(estimate_similarity(minhash({1, 2, 3}), minhash({3, 2, 1})), 1.0)
+        self.assertLess(estimate_similarity(minhash({1, 2, 3}), minhash({4, 5, 6})), 0.2)
+
+    def test_similar_recipes(self):
+        """Test that similar recipes are found through shared ingredients."""
+        results = similar_recipes(self.pancakes.id)
+        self.assertEqual([recipe_id for recipe_id, _ in results], [self.crepes.id])
+
+    def test_signature_follows_ingredient_changes(self):
+        """Test that removing a recipe's ingredients drops its signature."""
+        RecipeIngredient.objects.filter(recipe=self.crepes).delete()
+        process_all()
+        self.assertFalse(RecipeSignature.objects.filter(recipe=self.crepes).exists())
+        self.assertEqual(similar_recipes(self.pancakes.id), [])
+
+    def test_deleting_recipe_drops_signature(self):
+        """Test that deleting a recipe drops its signature."""
+        self.salad.delete()
+        process_all()
+        self.assertEqual(RecipeSignature.objects.count(), 2)
+
+    def test_index_rows_are_fast_deleted(self):
+        """Test that bucket rows are deleted in one query instead of loaded first."""
+        with self.assertNumQueries(1):
+            SignatureBucket.objects.all().delete()
+
+    def test_build_command(self):
+        """Test rebuilding the similarity index with the management command."""
+        RecipeSignature.objects.all().delete()
+        call_command("build_similarity_index", stdout=StringIO())
+        self.assertEqual(RecipeSignature.objects.count(), 3)
+        self.assertEqual(similar_recipes(self.crepes.id)[0][0], self.pancakes.id)
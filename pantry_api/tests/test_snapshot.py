@@ -0,0 +1,81 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.test import TestCase
+from pantry_api.models import Recipe, Ingredient, MeasurementUnit, RecipeIngredient
+from pantry_api.snapshot import TABLES, NutritionSnapshot, recipe_totals, write_snapshot
+from pantry_api.utils import optional_import
+
+class NutritionSnapshotTest(TestCase):
+    """Tests for the columnar nutrition snapshot."""
+
+    def setUp(self):
+        cup = MeasurementUnit.objects.create(name="Cup")
+        self.flour = Ingredient.objects.create(
+            name="Flour", calories=364, fats=1, proteins=10, carbohydrates=76, measurement_unit=cup
+        )
+        self.creme = Ingredient.objects.create(name="Crème fraîche", calories=292, fats="30.50")
+        self.recipe = Recipe.objects.create(name="Scones", instructions="Bake.", servings=6)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.flour, quantity=2)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.creme, quantity="0.50")
+        Recipe.objects.create(name="Water", instructions="Pour.", servings=1)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "nutrition.snapshot")
+        call_command("export_nutrition_snapshot", self.path, stdout=StringIO())
+
+    def test_columns(self):
+        """Test reading numeric columns, with -1 for missing references."""
+        with NutritionSnapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.counts["ingredients"], 2)
+            self.assertEqual(list(snapshot.column("ingredients", "id")), [self.flour.id, self.creme.id])
+            self.assertEqual(list(snapshot.column("ingredients", "fats")), [1.0, 30.5])
+            self.assertEqual(list(snapshot.column("ingredients", "measurement_unit_id"))[1], -1)
+            self.assertEqual(list(snapshot.column("recipeingredients", "quantity")), [2.0, 0.5])
+
+    def test_names(self):
+        """Test reading the UTF-8 name columns."""
+        with NutritionSnapshot(self.path) as snapshot:
+            self.assertEqual(list(snapshot.names("ingredients")), ["Flour", "Crème fraîche"])
+            self.assertEqual(snapshot.names("recipes")[-1], "Water")
+
+    def test_recipe_totals_match_models(self):
+        """Test that recipe totals computed from the snapshot match the models."""
+        with NutritionSnapshot(self.path) as snapshot:
+            totals = recipe_totals(snapshot)
+        self.assertEqual(totals[self.recipe.id][0], float(self.recipe.calories_per_serving * 6))
+        self.assertEqual(totals[self.recipe.id][2], float(self.recipe.total_fats))
+        self.assertEqual(len(totals), 2)
+
+    @skipIf(optional_import("numpy") is None, "NumPy is not installed")
+    def test_array_outlives_snapshot(self):
+        """Test that NumPy arrays stay usable after the snapshot is closed."""
+        with NutritionSnapshot(self.path) as snapshot:
+            fats = snapshot.array("ingredients", "fats")
+            quantities = snapshot.array("recipeingredients", "quantity")
+            self.assertEqual(fats.dtype.kind, "f")
+        self.assertEqual(fats.tolist(), [1.0, 30.5])
+        self.assertEqual(quantities.sum(), 2.5)
+
+    def test_rejects_other_files(self):
+        """Test that files without the snapshot header are rejected."""
+        with open(self.path, "wb") as other:
+            other.write(b"not a snapshot")
+        with self.assertRaises(ValueError):
+            NutritionSnapshot(self.path)
+
+    def test_rows_with_unexported_references_are_dropped(self):
+        """Test that rows referencing unexported rows are left out."""
+        late_recipe = Recipe.objects.create(name="Late", instructions="Wait.", servings=1)
+        RecipeIngredient.objects.create(recipe=late_recipe, ingredient=self.flour, quantity=1)
+        with mock.patch.dict(
+            TABLES, {"recipes": (Recipe.objects.exclude(pk=late_recipe.pk).order_by("pk"), *TABLES["recipes"][1:])}
+        ):
+            counts = write_snapshot(self.path)
+        self.assertEqual(counts["recipeingredients"], 2)
+        with NutritionSnapshot(self.path) as snapshot:
+            self.assertNotIn(late_recipe.id, recipe_totals(snapshot))
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from pantry_api.models import Recipe, Ingredient, RecipeIngredient, IngredientUsage
+from pantry_api.usage import rebuild_usage
+
+class IngredientUsageTest(TestCase):
+    """Tests for the incrementally maintained ingredient usage counters."""
+
+    def setUp(self):
+        self.flour = Ingredient.objects.create(name="Flour", calories=364)
+        self.sugar = Ingredient.objects.create(name="Sugar", calories=387)
+        self.bread = Recipe.objects.create(name="Bread", instructions="Knead.", servings=1)
+        self.cake = Recipe.objects.create(name="Cake", instructions="Bake.", servings=8)
+        self.bread_flour = RecipeIngredient.objects.create(recipe=self.bread, ingredient=self.flour, quantity=3)
+        RecipeIngredient.objects.create(recipe=self.cake, ingredient=self.flour, quantity=2)
+
+    def usage(self, ingredient):
+        return IngredientUsage.objects.get(ingredient=ingredient)
+
+    def test_counts_new_rows(self):
+        """Test that new recipe rows are counted in the usage counters."""
+        usage = self.usage(self.flour)
+        self.assertEqual(usage.recipe_count, 2)
+        self.assertEqual(usage.total_quantity, Decimal("5"))
+        self.assertEqual(usage.average_quantity, Decimal("2.50"))
+        self.assertEqual(self.usage(self.sugar).recipe_count, 0)
+
+    def test_quantity_update(self):
+        """Test that a quantity change updates the totals."""
+        self.bread_flour.quantity = 1.5
+        self.bread_flour.save()
+        self.assertEqual(self.usage(self.flour).total_quantity, Decimal("3.50"))
+
+    def test_ingredient_change(self):
+        """Test that moving a row to another ingredient moves its usage."""
+        self.bread_flour.ingredient = self.sugar
+        self.bread_flour.save()
+        self.assertEqual(self.usage(self.flour).recipe_count, 1)
+        self.assertEqual(self.usage(self.sugar).total_quantity, Decimal("3"))
+
+    def test_deletes(self):
+        """Test that deleted rows and recipes are removed from the counters."""
+        self.bread_flour.delete()
+        self.assertEqual(self.usage(self.flour).recipe_count, 1)
+        self.cake.delete()
+        usage = self.usage(self.flour)
+        self.assertEqual((usage.recipe_count, usage.total_quantity, usage.average_quantity), (0, 0, 0))
+
+    def test_deleting_ingredient(self):
+        """Test that deleting an ingredient removes its usage row."""
+        self.flour.delete()
+        self.assertFalse(IngredientUsage.objects.filter(ingredient_id=self.flour.id).exists())
+
+    def test_rebuild_matches_incremental(self):
+        """Test that a full rebuild matches the incrementally kept counters."""
+        expected = list(IngredientUsage.objects.order_by("pk").values())
+        IngredientUsage.objects.all().delete()
+        self.assertEqual(rebuild_usage(), 2)
+        self.assertEqual(list(IngredientUsage.objects.order_by("pk").values()), expected)
@@ -1,9 +1,15 @@
 from decimal import Decimal
+from unittest import mock
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from pantry_api.models import Recipe, MeasurementUnit, Ingredient, RecipeIngredient
+from pantry_api.jobs import process_all
+from pantry_api.nutrition_index import nutrition_index
+from pantry_api.views import MeasurementUnitViewSet
 
 class RecipeViewSetTest(APITestCase):
     """Test suite for the Recipe viewset CRUD operations."""
@@ -221,4 +227,316 @@ class RecipeIngredientViewSetTest(APITestCase):
             format='json',
             follow=True)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(RecipeIngredient.objects.filter(id=self.recipe_ingredient.id).exists())
\ No newline at end of file
+        self.assertFalse(RecipeIngredient.objects.filter(id=self.recipe_ingredient.id).exists())
+
+class SyncViewTest(APITestCase):
+    """Test suite for the delta sync endpoint."""
+
+    def setUp(self):
+        self.unit = MeasurementUnit.objects.create(name="Gram")
+        self.ingredient = Ingredient.objects.create(name="Oats", calories=389, measurement_unit=self.unit)
+        self.recipe = Recipe.objects.create(name="Porridge", instructions="Simmer.", servings=2)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.ingredient, quantity=1)
+
+    def test_initial_sync_returns_everything(self):
+        """Test that a sync without a cursor returns every row."""
+        response = self.client.get(reverse('sync'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(len(response.data['changed']['measurementunits']), 1)
+        self.assertEqual(len(response.data['changed']['ingredients']), 1)
+        self.assertEqual(len(response.data['changed']['recipes']), 1)
+        self.assertEqual(len(response.data['changed']['recipeingredients']), 1)
+
+    def test_sync_returns_only_changes_since_cursor(self):
+        """Test that a cursor limits the response to later changes and deletions."""
+        cursor = self.client.get(reverse('sync')).data['cursor']
+        self.ingredient.name = "Rolled Oats"
+        self.ingredient.save()
+        recipe_id = self.recipe.id
+        self.recipe.delete()
+
+        response = self.client.get(reverse('sync'), {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([i['name'] for i in response.data['changed']['ingredients']], ["Rolled Oats"])
+        self.assertEqual(response.data['changed']['recipes'], [])
+        self.assertEqual(response.data['deleted']['recipes'], [recipe_id])
+        self.assertEqual(len(response.data['deleted']['recipeingredients']), 1)
+
+        response = self.client.get(reverse('sync'), {'cursor': response.data['cursor']})
+        self.assertFalse(any(response.data['changed'].values()))
+        self.assertFalse(any(response.data['deleted'].values()))
+
+    def test_ingredient_edit_resyncs_recipes(self):
+        """Test that editing an ingredient re-sends the recipes embedding its nutrition."""
+        process_all()
+        cursor = self.client.get(reverse('sync')).data['cursor']
+        self.ingredient.calories = 370
+        self.ingredient.save()
+        process_all()
+        response = self.client.get(reverse('sync'), {'cursor': cursor})
+        recipes = response.data['changed']['recipes']
+        self.assertEqual([r['id'] for r in recipes], [self.recipe.id])
+        self.assertEqual(recipes[0]['calories_per_serving'], 185)
+
+    def test_sync_pages_with_limit(self):
+        """Test that a limited sync reports more changes and resumes from its cursor."""
+        first = self.client.get(reverse('sync'), {'limit': 3})
+        self.assertTrue(first.data['has_more'])
+        second = self.client.get(reverse('sync'), {'cursor': first.data['cursor'], 'limit': 3})
+        self.assertFalse(second.data['has_more'])
+        for resource in first.data['changed']:
+            self.assertEqual(len(first.data['changed'][resource]) + len(second.data['changed'][resource]), 1)
+
+    def test_sync_pages_across_unit_delete(self):
+        """Test that every ingredient orphaned by a unit delete is re-sent when paging."""
+        for name in ("Rye", "Spelt", "Barley"):
+            Ingredient.objects.create(name=name, calories=300, measurement_unit=self.unit)
+        cursor = self.client.get(reverse('sync')).data['cursor']
+        self.unit.delete()
+
+        resent, has_more = [], True
+        while has_more:
+            response = self.client.get(reverse('sync'), {'cursor': cursor, 'limit': 1})
+            resent += response.data['changed']['ingredients']
+            cursor, has_more = response.data['cursor'], response.data['has_more']
+        self.assertEqual(len(resent), 4)
+        self.assertTrue(all(i['measurement_unit'] is None for i in resent))
+
+    def test_sync_includes_bulk_created_rows(self):
+        """Test that rows created without save() are synced with and without a cursor."""
+        cursor = self.client.get(reverse('sync')).data['cursor']
+        Ingredient.objects.bulk_create([Ingredient(name="Rye", calories=300), Ingredient(name="Spelt", calories=300)])
+        response = self.client.get(reverse('sync'), {'cursor': cursor, 'limit': 1})
+        self.assertEqual([i['name'] for i in response.data['changed']['ingredients']], ["Rye"])
+        response = self.client.get(reverse('sync'), {'cursor': response.data['cursor']})
+        self.assertEqual([i['name'] for i in response.data['changed']['ingredients']], ["Spelt"])
+        response = self.client.get(reverse('sync'))
+        self.assertEqual(len(response.data['changed']['ingredients']), 3)
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        response = self.client.get(reverse('sync'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeNearestTest(APITestCase):
+    """Test suite for the nearest-nutrition recipe search."""
+
+    def setUp(self):
+        nutrition_index.invalidate()
+        self.oats = Ingredient.objects.create(name="Oats", calories=389, proteins=17, fats=7, carbohydrates=66)
+        self.egg = Ingredient.objects.create(name="Egg", calories=155, proteins=13, fats=11, carbohydrates=1)
+        self.porridge = Recipe.objects.create(name="Porridge", instructions="Simmer.", servings=1)
+        RecipeIngredient.objects.create(recipe=self.porridge, ingredient=self.oats, quantity=1)
+        self.omelette = Recipe.objects.create(name="Omelette", instructions="Whisk and fry.", servings=1)
+        RecipeIngredient.objects.create(recipe=self.omelette, ingredient=self.egg, quantity=2)
+        process_all()
+
+    def test_nearest_recipes(self):
+        """Test that recipes come back closest first with their distance."""
+        response = self.client.get(reverse('recipe-nearest'), {'calories': 300, 'proteins': 26, 'k': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['name'] for r in response.data], ['Omelette', 'Porridge'])
+        self.assertIn('distance', response.data[0])
+
+    def test_nearest_recipes_with_filter(self):
+        """Test that the ingredient filter narrows the candidates."""
+        response = self.client.get(reverse('recipe-nearest'), {'calories': 300, 'ingredient': self.oats.id})
+        self.assertEqual([r['name'] for r in response.data], ['Porridge'])
+
+    def test_nearest_recipes_invalid_target(self):
+        """Test that non-numeric targets are rejected."""
+        response = self.client.get(reverse('recipe-nearest'), {'calories': 'lots'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for params in ({'calories': 'nan'}, {'proteins': 'inf'}, {'weight_fats': '-inf'}):
+            response = self.client.get(reverse('recipe-nearest'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nearest_recipes_k_is_capped(self):
+        """Test that k above the cap is rejected."""
+        response = self.client.get(reverse('recipe-nearest'), {'k': 100})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('recipe-nearest'), {'k': 1000000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSimilarTest(APITestCase):
+    """Test suite for the similar-recipe recommendations."""
+
+    def test_similar_recipes(self):
+        """Test that recipes sharing ingredients are recommended."""
+        flour = Ingredient.objects.create(name="Flour", calories=364)
+        egg = Ingredient.objects.create(name="Egg", calories=155)
+        milk = Ingredient.objects.create(name="Milk", calories=42)
+        pancakes = Recipe.objects.create(name="Pancakes", instructions="Fry.", servings=4)
+        crepes = Recipe.objects.create(name="Crepes", instructions="Fry thin.", servings=4)
+        for recipe in (pancakes, crepes):
+            for ingredient in (flour, egg, milk):
+                RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=1)
+        process_all()
+
+        response = self.client.get(reverse('recipe-similar', kwargs={'pk': pancakes.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['name'] for r in response.data], ['Crepes'])
+        self.assertEqual(response.data[0]['similarity'], 1.0)
+
+
+class RecomputeJobViewSetTest(APITestCase):
+    """Test suite for the recompute job status endpoints."""
+
+    def test_job_stats(self):
+        """Test that queue depth counts pending jobs."""
+        Recipe.objects.create(name="Toast", instructions="Toast.", servings=1)
+        response = self.client.get(reverse('recomputejob-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['queue_depth'], 1)
+
+        process_all()
+        response = self.client.get(reverse('recomputejob-stats'))
+        self.assertEqual(response.data['queue_depth'], 0)
+        self.assertEqual(response.data['counts']['done'], {'recipe_nutrition': 1})
+
+    def test_list_jobs_by_status(self):
+        """Test filtering jobs by status."""
+        Recipe.objects.create(name="Toast", instructions="Toast.", servings=1)
+        response = self.client.get(reverse('recomputejob-list'), {'status': 'pending'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['kind'], 'recipe_nutrition')
+
+
+class IngredientUsageViewTest(APITestCase):
+    """Test suite for the ingredient usage fields and popularity endpoint."""
+
+    def setUp(self):
+        self.salt = Ingredient.objects.create(name="Salt", calories=0)
+        self.pepper = Ingredient.objects.create(name="Pepper", calories=251)
+        for i in range(3):
+            recipe = Recipe.objects.create(name=f"Stew {i}", instructions="Simmer.", servings=4)
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=self.salt, quantity=1)
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=self.pepper, quantity=5)
+
+    def test_usage_fields(self):
+        """Test that ingredients expose their usage counters."""
+        response = self.client.get(reverse('ingredient-detail', kwargs={'pk': self.salt.id}))
+        self.assertEqual(response.data['recipe_count'], 3)
+        self.assertEqual(Decimal(response.data['average_quantity']), 1)
+
+    def test_ordering(self):
+        """Test sorting ingredients by a usage counter."""
+        response = self.client.get(reverse('ingredient-list'), {'ordering': '-average_quantity'})
+        self.assertEqual([i['name'] for i in response.data], ['Pepper', 'Salt'])
+        response = self.client.get(reverse('ingredient-list'), {'ordering': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(reverse('ingredient-detail', kwargs={'pk': self.pepper.id}) + '?ordering=unknown')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_popular(self):
+        """Test the top-n most used ingredients."""
+        response = self.client.get(reverse('ingredient-popular'), {'n': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([i['name'] for i in response.data], ['Salt'])
+
+
+class BatchViewTest(APITestCase):
+    """Test suite for the batched operations endpoint."""
+
+    def test_batch_with_references(self):
+        """Test creating related objects in one batch using references."""
+        operations = [
+            {'method': 'POST', 'resource': 'ingredients', 'ref': 'milk', 'data': {'name': 'Milk', 'calories': 42}},
+            {'method': 'POST', 'resource': 'recipes', 'ref': 'latte', 'data': {'name': 'Latte', 'instructions': 'Steam.', 'servings': 1}},
+            {'method': 'POST', 'resource': 'recipeingredients', 'data': {'recipe': {'$ref': 'latte'}, 'ingredient': {'$ref': 'milk'}, 'quantity': 2}},
+            {'method': 'PATCH', 'resource': 'recipes', 'id': {'$ref': 'latte'}, 'data': {'servings': 2}},
+            {'method': 'GET', 'resource': 'recipes', 'id': {'$ref': 'latte'}},
+        ]
+        response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['results']], [201, 201, 201, 200, 200])
+        latte = response.data['results'][4]['data']
+        self.assertEqual(latte['servings'], 2)
+        self.assertEqual(latte['calories_per_serving'], 42)
+        self.assertEqual(RecipeIngredient.objects.get().recipe_id, latte['id'])
+
+    def test_reads_see_earlier_writes(self):
+        """Test that objects read earlier in a batch reflect later writes."""
+        operations = [
+            {'method': 'POST', 'resource': 'ingredients', 'ref': 'milk', 'data': {'name': 'Milk', 'calories': 42}},
+            {'method': 'GET', 'resource': 'ingredients', 'id': {'$ref': 'milk'}},
+            {'method': 'POST', 'resource': 'recipes', 'ref': 'latte', 'data': {'name': 'Latte', 'instructions': 'Steam.', 'servings': 1}},
+            {'method': 'POST', 'resource': 'recipeingredients', 'data': {'recipe': {'$ref': 'latte'}, 'ingredient': {'$ref': 'milk'}, 'quantity': 2}},
+            {'method': 'GET', 'resource': 'ingredients', 'id': {'$ref': 'milk'}},
+        ]
+        response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][1]['data']['recipe_count'], 0)
+        self.assertEqual(response.data['results'][4]['data']['recipe_count'], 1)
+
+    def test_lookups_survive_unrelated_writes(self):
+        """Test that a write only evicts the cached objects it may have changed."""
+        unit = MeasurementUnit.objects.create(name="Cup")
+        milk = Ingredient.objects.create(name="Milk", calories=42, measurement_unit=unit)
+        operations = [
+            {'method': 'GET', 'resource': 'ingredients', 'id': milk.id},
+            {'method': 'POST', 'resource': 'measurementunits', 'data': {'name': 'Pint'}},
+            {'method': 'GET', 'resource': 'ingredients', 'id': milk.id},
+            {'method': 'PATCH', 'resource': 'measurementunits', 'id': unit.id, 'data': {'name': 'Mug'}},
+            {'method': 'GET', 'resource': 'ingredients', 'id': milk.id},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(results[2]['data']['measurement_unit'], 'Cup')
+        self.assertEqual(results[4]['data']['measurement_unit'], 'Mug')
+        lookups = [q for q in queries if q['sql'].startswith('SELECT') and 'WHERE "pantry_api_ingredient"."id" =' in q['sql']]
+        self.assertEqual(len(lookups), 2)
+
+    def test_uses_viewset_hooks(self):
+        """Test that batch operations go through the viewset's queryset and perform hooks."""
+        unit = MeasurementUnit.objects.create(name="Cup")
+        operations = [{'method': 'POST', 'resource': 'measurementunits', 'data': {'name': 'Pint'}}]
+        with mock.patch.object(MeasurementUnitViewSet, 'perform_create', autospec=True,
+                               side_effect=lambda viewset, serializer: serializer.save(name='Quart')) as perform_create:
+            response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        perform_create.assert_called_once()
+        self.assertEqual(response.data['results'][0]['data']['name'], 'Quart')
+        operations = [{'method': 'GET', 'resource': 'measurementunits', 'id': unit.id}]
+        with mock.patch.object(MeasurementUnitViewSet, 'get_queryset', return_value=MeasurementUnit.objects.none()):
+            response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 404)
+
+    def test_failed_operation_rolls_back(self):
+        """Test that a failing operation rolls back the whole batch."""
+        operations = [
+            {'method': 'POST', 'resource': 'measurementunits', 'data': {'name': 'Cup'}},
+            {'method': 'POST', 'resource': 'measurementunits', 'data': {'name': ''}},
+            {'method': 'POST', 'resource': 'measurementunits', 'data': {'name': 'Pint'}},
+        ]
+        response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([r['status'] for r in response.data['results']], [201, 400])
+        self.assertIn('name', response.data['results'][1]['errors'])
+        self.assertFalse(MeasurementUnit.objects.exists())
+
+    def test_delete_and_missing_object(self):
+        """Test deleting in a batch and reporting missing objects."""
+        unit = MeasurementUnit.objects.create(name="Cup")
+        operations = [
+            {'method': 'DELETE', 'resource': 'measurementunits', 'id': unit.id},
+            {'method': 'GET', 'resource': 'measurementunits', 'id': unit.id},
+        ]
+        response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], [204, 404])
+        self.assertTrue(MeasurementUnit.objects.filter(id=unit.id).exists())
+
+    def test_invalid_batch(self):
+        """Test rejecting malformed batches."""
+        response = self.client.post(reverse('batch'), {'operations': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        operations = [{'method': 'POST', 'resource': 'jobs', 'data': {}}]
+        response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 400)
+        operations = [{'method': 'GET', 'resource': 'recipes', 'id': {'$ref': 'missing'}}]
+        response = self.client.post(reverse('batch'), {'operations': operations}, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 400)
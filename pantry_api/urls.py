@@ -1,13 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import IngredientViewSet, RecipeViewSet, MeasurementUnitViewSet, RecipeIngredientViewSet
+from .views import (
+    IngredientViewSet,
+    RecipeViewSet,
+    MeasurementUnitViewSet,
+    RecipeIngredientViewSet,
+    RecomputeJobViewSet,
+    SyncView,
+    BatchView,
+)
 
 router = DefaultRouter()
 router.register(r"ingredients", IngredientViewSet)
 router.register(r"recipes", RecipeViewSet)
 router.register(r"measurementunits", MeasurementUnitViewSet)
-router.register(r'recipeingredients', RecipeIngredientViewSet)
+router.register(r"recipeingredients", RecipeIngredientViewSet)
+router.register(r"jobs", RecomputeJobViewSet)
 
 urlpatterns = [
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("batch/", BatchView.as_view(), name="batch"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,70 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Sum
+from .models import Ingredient, IngredientUsage, RecipeIngredient
+
+CENT = Decimal("0.01")
+
+
+def to_quantity(value):
+    """
+    Converts a quantity that may still be an int, float or string on an unsaved instance
+    into a two-place Decimal, the way RecipeIngredient.quantity is stored.
+    """
+    return Decimal(str(value)).quantize(CENT)
+
+
+def apply_usage_change(ingredient_id, recipe_delta, quantity_delta):
+    """
+    Adjusts an ingredient's counters by the given deltas. Ingredients that are being deleted
+    have already lost their usage row and are skipped.
+    """
+    with transaction.atomic():
+        usage = (
+            IngredientUsage.objects.select_for_update()
+            .filter(ingredient_id=ingredient_id)
+            .first()
+        )
+        if usage is None:
+            return
+        usage.recipe_count += recipe_delta
+        usage.total_quantity += quantity_delta
+        usage.average_quantity = (
+            (usage.total_quantity / usage.recipe_count).quantize(CENT)
+            if usage.recipe_count
+            else Decimal(0)
+        )
+        usage.save()
+
+
+def rebuild_usage(batch_size=1000):
+    """
+    Recomputes every ingredient's counters from RecipeIngredient with one aggregate query,
+    e.g. after bulk imports that bypass model signals. Returns the number of ingredients.
+    """
+    totals = {
+        row["ingredient_id"]: row
+        for row in RecipeIngredient.objects.values("ingredient_id")
+        .annotate(recipe_count=Count("pk"), total_quantity=Sum("quantity"))
+        .order_by()
+    }
+    usages = []
+    for ingredient_id in Ingredient.objects.values_list("pk", flat=True):
+        row = totals.get(ingredient_id, {"recipe_count": 0, "total_quantity": 0})
+        total = Decimal(row["total_quantity"] or 0)
+        usages.append(
+            IngredientUsage(
+                ingredient_id=ingredient_id,
+                recipe_count=row["recipe_count"],
+                total_quantity=total,
+                average_quantity=(
+                    (total / row["recipe_count"]).quantize(CENT)
+                    if row["recipe_count"]
+                    else Decimal(0)
+                ),
+            )
+        )
+    with transaction.atomic():
+        IngredientUsage.objects.all().delete()
+        IngredientUsage.objects.bulk_create(usages, batch_size=batch_size)
+    return len(usages)
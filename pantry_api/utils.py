@@ -0,0 +1,14 @@
+import importlib
+from functools import cache
+
+
+@cache
+def optional_import(name):
+    """
+    Imports an optional dependency on first use, returning None when it is not installed.
+    Keeping heavy packages such as NumPy out of module import time shortens worker cold starts.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
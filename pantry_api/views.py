@@ -1,11 +1,24 @@
-from rest_framework import viewsets
-from .models import Ingredient, Recipe, MeasurementUnit, RecipeIngredient
+import math
+from django.db.models import Count, F
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import Ingredient, Recipe, MeasurementUnit, RecipeIngredient, RecomputeJob
 from .serializers import (
-    IngredientSerializer,
+    IngredientStatsSerializer,
     RecipeSerializer,
     MeasurementUnitSerializer,
     RecipeIngredientSerializer,
+    RecomputeJobSerializer,
 )
+from .batch import BatchRunner
+from .nutrition_index import NUTRIENTS, nutrition_index
+from .similarity import similar_recipes
+from .sync import collect_changes, decode_cursor
 
 
 class MeasurementUnitViewSet(viewsets.ModelViewSet):
@@ -24,6 +37,74 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
+    max_k = 100
+
+    def ranked_results(self, ranked, score_field):
+        """
+        Serializes (recipe_id, score) pairs in order, adding each score under score_field.
+        """
+        recipes = Recipe.objects.prefetch_related(
+            "ingredients__measurement_unit", "recipeingredient_set__ingredient"
+        ).in_bulk([recipe_id for recipe_id, _ in ranked])
+        results = []
+        for recipe_id, score in ranked:
+            if recipe_id in recipes:
+                data = self.get_serializer(recipes[recipe_id]).data
+                data[score_field] = score
+                results.append(data)
+        return results
+
+    @action(detail=False)
+    def nearest(self, request):
+        """
+        Returns the k recipes whose per-serving nutrition is closest to the requested targets,
+        e.g. ?calories=600&proteins=40&fats=20&carbohydrates=60&k=20 (k at most max_k).
+        Optional weight_<nutrient> parameters scale each component of the distance, and
+        name / ingredient narrow the candidates.
+        """
+        params = request.query_params
+        try:
+            target = [float(params.get(n, 0)) for n in NUTRIENTS]
+            weights = [float(params.get(f"weight_{n}", 1)) for n in NUTRIENTS]
+            k = int(params.get("k", 20))
+            ingredient = params.get("ingredient")
+            ingredient = int(ingredient) if ingredient is not None else None
+        except ValueError:
+            raise ValidationError("Targets, weights, k and ingredient must be numbers.")
+        if not all(math.isfinite(value) for value in target + weights):
+            raise ValidationError("Targets and weights must be finite numbers.")
+        if not 1 <= k <= self.max_k or any(w < 0 for w in weights):
+            raise ValidationError(
+                f"k must be between 1 and {self.max_k} and weights must not be negative."
+            )
+
+        candidates = None
+        if "name" in params or ingredient is not None:
+            filtered = Recipe.objects.all()
+            if "name" in params:
+                filtered = filtered.filter(name__icontains=params["name"])
+            if ingredient is not None:
+                filtered = filtered.filter(ingredients=ingredient)
+            candidates = set(filtered.values_list("pk", flat=True))
+
+        nearest = nutrition_index.search(target, k, weights, candidates)
+        return Response(self.ranked_results(nearest, "distance"))
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """
+        Returns the recipes whose ingredient sets overlap most with this one, e.g. ?n=10.
+        """
+        recipe = self.get_object()
+        try:
+            n = int(request.query_params.get("n", 10))
+        except ValueError:
+            raise ValidationError("n must be a number.")
+        if n < 1:
+            raise ValidationError("n must be positive.")
+
+        similar = similar_recipes(recipe.pk, n)
+        return Response(self.ranked_results(similar, "similarity"))
 
 
 class IngredientViewSet(viewsets.ModelViewSet):
@@ -31,8 +112,43 @@ class IngredientViewSet(viewsets.ModelViewSet):
     A viewset for viewing and editing ingredient instances.
     """
 
-    queryset = Ingredient.objects.all()
-    serializer_class = IngredientSerializer
+    # Usage counters are annotated under their API names so ?ordering= and popular can sort
+    # on them; the underlying columns are indexed.
+    queryset = Ingredient.objects.select_related("measurement_unit", "usage").annotate(
+        recipe_count=F("usage__recipe_count"),
+        total_quantity=F("usage__total_quantity"),
+        average_quantity=F("usage__average_quantity"),
+    )
+    serializer_class = IngredientStatsSerializer
+    filter_backends = [OrderingFilter]
+    ordering_fields = [
+        "name",
+        "calories",
+        "recipe_count",
+        "total_quantity",
+        "average_quantity",
+    ]
+    popularity_fields = ["recipe_count", "total_quantity", "average_quantity"]
+
+    @action(detail=False)
+    def popular(self, request):
+        """
+        Returns the top n ingredients by a usage counter, e.g. ?by=recipe_count&n=10.
+        """
+        by = request.query_params.get("by", "recipe_count")
+        if by not in self.popularity_fields:
+            raise ValidationError(
+                {"by": f"Choose from {', '.join(self.popularity_fields)}."}
+            )
+        try:
+            n = int(request.query_params.get("n", 10))
+        except ValueError:
+            raise ValidationError("n must be a number.")
+        if n < 1:
+            raise ValidationError("n must be positive.")
+
+        top = self.get_queryset().order_by(f"-{by}", "pk")[:n]
+        return Response(self.get_serializer(top, many=True).data)
 
 
 class RecipeIngredientViewSet(viewsets.ModelViewSet):
@@ -42,3 +158,93 @@ class RecipeIngredientViewSet(viewsets.ModelViewSet):
 
     queryset = RecipeIngredient.objects.all()
     serializer_class = RecipeIngredientSerializer
+
+
+class RecomputeJobPagination(PageNumberPagination):
+    """
+    Pages the recompute job listing, newest first.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class RecomputeJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    A viewset for inspecting recompute jobs. Filter with ?status= and ?kind=.
+    Finished jobs are pruned by the recompute worker after its retention period.
+    """
+
+    queryset = RecomputeJob.objects.order_by("-pk")
+    serializer_class = RecomputeJobSerializer
+    pagination_class = RecomputeJobPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for field in ("status", "kind"):
+            if field in self.request.query_params:
+                queryset = queryset.filter(**{field: self.request.query_params[field]})
+        return queryset
+
+    @action(detail=False)
+    def stats(self, request):
+        """
+        Returns the number of jobs per status and kind, and the pending queue depth.
+        """
+        counts = {status: {} for status, _ in RecomputeJob.STATUS_CHOICES}
+        rows = RecomputeJob.objects.values("status", "kind").annotate(count=Count("pk"))
+        for row in rows.order_by():
+            counts[row["status"]][row["kind"]] = row["count"]
+        return Response(
+            {
+                "queue_depth": sum(counts[RecomputeJob.PENDING].values()),
+                "counts": counts,
+            }
+        )
+
+
+class SyncView(APIView):
+    """
+    Returns the rows created, changed or deleted since the client's cursor.
+    Clients start with no cursor and keep passing back the returned one until has_more is false.
+    """
+
+    default_limit = 500
+    max_limit = 5000
+
+    def get(self, request):
+        since = decode_cursor(request.query_params.get("cursor"))
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        return Response(collect_changes(since, limit))
+
+
+class BatchView(APIView):
+    """
+    Runs an ordered list of create, read, update and delete operations in one transaction.
+
+    Each operation is {"method", "resource", "id", "data", "ref"}. A POST with a "ref" name
+    can be referred to later as {"$ref": name} in an id or in data. If any operation fails
+    the whole batch is rolled back and the results stop at the failing operation.
+    """
+
+    resources = {
+        "ingredients": IngredientViewSet,
+        "recipes": RecipeViewSet,
+        "measurementunits": MeasurementUnitViewSet,
+        "recipeingredients": RecipeIngredientViewSet,
+    }
+
+    def post(self, request):
+        operations = (
+            request.data.get("operations") if hasattr(request.data, "get") else None
+        )
+        succeeded, results = BatchRunner(request, self.resources).run(operations)
+        return Response(
+            {"results": results},
+            status=status.HTTP_200_OK if succeeded else status.HTTP_400_BAD_REQUEST,
+        )